@@ -4,93 +4,106 @@ Email: yashpradeeppathak@gmail.com
 Description: ArUco marker detection and processing utilities
 """
 
+import argparse
 import cv2
-from cv2 import aruco
 import numpy as np
-import math
+from marker_detector import MarkerDetector, MarkerDetections
+from frame_grabber import LatestFrameGrabber
+from replay import run_replay, print_summary
+from display_worker import DisplayWorker
 
-def detect_ArUco_details(image):
-    ArUco_details_dict = {}
-    ArUco_corners = {}
-    
-    # Define the ArUco dictionary (DICT_4X4_250 in this case)
-    aruco_dict = cv2.aruco.getPredefinedDictionary(aruco.DICT_4X4_250)
-
-    # Detect ArUco markers in the input image
-    corners, ids, _ = aruco.detectMarkers(image, aruco_dict)
-
-    # Check if ArUco markers were detected
-    if ids is not None:
-        for i in range(len(ids)):
-            # Extract the ArUco marker ID (cast to an integer)
-            id = int(ids[i][0])
-
-            # Extract the corner coordinates of the detected marker
-            corner_coordinates = corners[i][0]
-
-            # Calculate the center of the marker by taking the mean of x and y coordinates
-            center_x = int(np.mean(corner_coordinates[:, 0]))
-            center_y = int(np.mean(corner_coordinates[:, 1]))
-
-            # Calculate the angle from the vertical axis
-            angle = int(math.degrees(math.atan2(corner_coordinates[1][1] - corner_coordinates[0][1],
-                                                corner_coordinates[1][0] - corner_coordinates[0][0])))
-
-            # Store the details in dictionaries
-            ArUco_details_dict[id] = [[center_x, center_y], angle]
-            ArUco_corners[id] = corner_coordinates
+# Detection scale: 0.5 or 0.25 finds markers on a downscaled frame and refines the corners
+# at full resolution, e.g. to run the camera at 1080p without full-resolution detection cost
+DETECTION_SCALE = 1.0
 
-    return ArUco_details_dict, ArUco_corners 
+# Shared ArUco detector, built once and reused for every frame
+detector = MarkerDetector(downscale=DETECTION_SCALE)
 
-def mark_ArUco_image(image, ArUco_details_dict, ArUco_corners):
-    for ids, details in ArUco_details_dict.items():
-        center = details[0]
+# Detect ArUco markers and return their geometry as a MarkerDetections result
+def detect_ArUco_details(image):
+    # Detect ArUco markers in the input image using the shared detector
+    corners, ids = detector.detect(image)
+
+    # Centers, angles and sizes for all markers are computed in one vectorized pass
+    return MarkerDetections.from_detection(corners, ids)
+
+def mark_ArUco_image(image, detections):
+    # Integer pixel positions for all markers at once
+    centers = detections.centers.astype(int).tolist()
+    corners = detections.corners.astype(int).tolist()
+    tl_tr_centers = ((detections.corners[:, 0] + detections.corners[:, 1]) / 2).astype(int)
+    display_offsets = np.hypot(*(tl_tr_centers - detections.centers.astype(int)).T).astype(int).tolist()
+    angles = detections.angles.astype(int).tolist()
+    tl_tr_centers = tl_tr_centers.tolist()
+
+    for i, ids in enumerate(detections.ids.tolist()):
+        center = centers[i]
         cv2.circle(image, center, 5, (0,0,255), -1)
 
-        corner = ArUco_corners[int(ids)]
-        cv2.circle(image, (int(corner[0][0]), int(corner[0][1])), 5, (50, 50, 50), -1)
-        cv2.circle(image, (int(corner[1][0]), int(corner[1][1])), 5, (0, 255, 0), -1)
-        cv2.circle(image, (int(corner[2][0]), int(corner[2][1])), 5, (128, 0, 255), -1)
-        cv2.circle(image, (int(corner[3][0]), int(corner[3][1])), 5, (25, 255, 255), -1)
-
-        tl_tr_center_x = int((corner[0][0] + corner[1][0]) / 2)
-        tl_tr_center_y = int((corner[0][1] + corner[1][1]) / 2) 
+        corner = corners[i]
+        cv2.circle(image, corner[0], 5, (50, 50, 50), -1)
+        cv2.circle(image, corner[1], 5, (0, 255, 0), -1)
+        cv2.circle(image, corner[2], 5, (128, 0, 255), -1)
+        cv2.circle(image, corner[3], 5, (25, 255, 255), -1)
 
-        cv2.line(image,center,(tl_tr_center_x, tl_tr_center_y),(255,0,0),5)
-        display_offset = int(math.sqrt((tl_tr_center_x - center[0])**2+(tl_tr_center_y - center[1])**2))
+        cv2.line(image,center,tl_tr_centers[i],(255,0,0),5)
+        display_offset = display_offsets[i]
         cv2.putText(image,str(ids),(center[0]+int(display_offset/2),center[1]),cv2.FONT_HERSHEY_COMPLEX, 1, (0, 0, 255), 2)
-        angle = details[1]
+        angle = angles[i]
         cv2.putText(image,str(angle),(center[0]-display_offset,center[1]),cv2.FONT_HERSHEY_COMPLEX, 1, (0, 255, 0), 2)
     return image
 
 # Real-time video capture
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ArUco marker detection")
+    parser.add_argument("--replay", metavar="SOURCE",
+                        help="headless replay of a video file or image directory instead of the webcam")
+    parser.add_argument("--log", default="replay_log.npz", help="columnar detection log written in replay mode")
+    parser.add_argument("--headless", action="store_true", help="run without a window, skipping all drawing")
+    parser.add_argument("--display-fps", type=float, default=15.0, help="maximum rate of the annotated preview")
+    args = parser.parse_args()
+
+    # Headless mode: detect as fast as possible and write the detections to a log
+    if args.replay:
+        print_summary(run_replay(args.replay, detect_ArUco_details, log_path=args.log))
+        exit()
+
     cap = cv2.VideoCapture(0)  # Capture from webcam
 
     if not cap.isOpened():
         print("Error: Could not open video stream.")
         exit()
 
-    while True:
-        ret, frame = cap.read()
+    # Capture frames on a separate thread, keeping only the newest one
+    grabber = LatestFrameGrabber(cap).start()
 
-        if not ret:
-            print("Failed to grab frame")
-            break
+    # Annotation and display run on their own thread at a lower rate
+    display = DisplayWorker("Aruco Marker Detection", mark_ArUco_image,
+                            max_fps=args.display_fps, headless=args.headless).start()
 
-        # Detect ArUco markers
-        ArUco_details_dict, ArUco_corners = detect_ArUco_details(frame)
-        
-        # Mark the ArUco markers on the frame
-        frame = mark_ArUco_image(frame, ArUco_details_dict, ArUco_corners)
-        
-        # Display the frame
-        cv2.imshow("Aruco Marker Detection", frame)
+    try:
+        while True:
+            # Wait for the newest frame, stale frames are dropped by the grabber
+            ret, frame = grabber.read()
 
-        # Exit on 'q' key press
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+            if not ret:
+                print("Failed to grab frame")
+                break
 
-    # Release video capture object and close windows
-    cap.release()
-    cv2.destroyAllWindows()
+            # Detect ArUco markers
+            detections = detect_ArUco_details(frame)
+        
+            # Hand the frame to the display thread, it is marked and shown there
+            display.submit(frame, detections)
+
+            # Exit on 'q' key press
+            if display.quit_requested.is_set():
+                break
+    except KeyboardInterrupt:
+        pass  # Ctrl-C is the way out in headless mode
+    finally:
+        # Stop the capture thread, close the window and release video capture object
+        grabber.stop()
+        display.stop()
+        print(f"Dropped {grabber.dropped_frames} stale frames")
+        cap.release()
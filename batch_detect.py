@@ -0,0 +1,98 @@
+"""
+Author: Yash Pathak [Github: vindicta07]
+Email: yashpradeeppathak@gmail.com
+Description: Multi-process batch ArUco detection over recorded runs
+"""
+
+import argparse
+import os
+import time
+from multiprocessing import Pool
+
+import cv2
+import numpy as np
+
+from aruco import detect_ArUco_details
+
+# Each worker process runs single-threaded OpenCV, parallelism comes from the pool
+def init_worker():
+    cv2.setNumThreads(1)
+
+# Split [0, frame_count) into (start, stop) frame ranges
+def split_frame_ranges(frame_count, chunk_size):
+    return [(start, min(start + chunk_size, frame_count)) for start in range(0, frame_count, chunk_size)]
+
+# Worker: seek to the chunk start, decode and detect every frame in [start, stop).
+# A stop of None reads until the end of the video
+def detect_chunk(args):
+    video_path, start, stop = args
+    cap = cv2.VideoCapture(video_path)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+
+    frames, ids, centers, angles, sizes = [], [], [], [], []
+    frame_index = start
+    while stop is None or frame_index < stop:
+        ret, frame = cap.read()
+        if not ret:
+            break
+
+        detections = detect_ArUco_details(frame)
+        if len(detections):
+            frames.append(np.full(len(detections), frame_index, np.int32))
+            ids.append(detections.ids)
+            centers.append(detections.centers)
+            angles.append(detections.angles)
+            sizes.append(detections.sizes)
+        frame_index += 1
+    cap.release()
+
+    if not frames:
+        return (np.empty(0, np.int32), np.empty(0, np.int32), np.empty((0, 2), np.float32),
+                np.empty(0, np.float32), np.empty(0, np.float32), frame_index - start)
+    return (np.concatenate(frames), np.concatenate(ids), np.concatenate(centers),
+            np.concatenate(angles), np.concatenate(sizes), frame_index - start)
+
+# Detect markers in every frame of a video across a process pool. Chunks are merged back
+# in frame order into flat marker-track columns (frame, id, center, angle, size)
+def batch_detect(video_path, workers=None, chunk_size=300):
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video: {video_path}")
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+
+    tasks = [(video_path, start, stop) for start, stop in split_frame_ranges(frame_count, chunk_size)]
+    if tasks:
+        # The reported frame count can be short, let the last chunk read to the end
+        tasks[-1] = (video_path, tasks[-1][1], None)
+    else:
+        tasks = [(video_path, 0, None)]
+
+    with Pool(workers or os.cpu_count(), initializer=init_worker) as pool:
+        results = pool.map(detect_chunk, tasks, chunksize=1)
+
+    return {
+        "frame": np.concatenate([r[0] for r in results]),
+        "id": np.concatenate([r[1] for r in results]),
+        "center": np.concatenate([r[2] for r in results]).astype(np.float32),
+        "angle": np.concatenate([r[3] for r in results]).astype(np.float32),
+        "size": np.concatenate([r[4] for r in results]).astype(np.float32),
+        "frames_processed": np.int64(sum(r[5] for r in results)),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch ArUco detection over a recorded video")
+    parser.add_argument("video", help="recorded video file")
+    parser.add_argument("--output", default="marker_tracks.npz", help="npz file for the merged marker tracks")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=300, help="frames per worker task")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    tracks = batch_detect(args.video, args.workers, args.chunk_size)
+    elapsed = time.perf_counter() - start
+
+    np.savez_compressed(args.output, **tracks)
+    frames = int(tracks["frames_processed"])
+    print(f"Processed {frames} frames in {elapsed:.2f} s ({frames / elapsed:.1f} fps), "
+          f"{len(tracks['id'])} marker detections written to {args.output}")
@@ -0,0 +1,321 @@
+"""
+Author: Yash Pathak [Github: vindicta07]
+Email: yashpradeeppathak@gmail.com
+Description: Synthetic ArUco detection and annotation benchmark with accuracy checks and baseline gating
+"""
+
+import argparse
+import importlib
+import json
+import time
+
+import cv2
+from cv2 import aruco
+import numpy as np
+
+RESOLUTIONS = {
+    "480p": (640, 480),
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+}
+
+# Rendering conditions. scale is the marker side as a fraction of the frame height, rotation
+# the maximum in-plane rotation (deg), blur the Gaussian sigma (px), noise the Gaussian noise
+# sigma (grey levels) and lighting the strength of a left-to-right illumination falloff
+SCENARIOS = {
+    "clean":   dict(count=1, scale=0.25, rotation=0, blur=0.0, noise=0.0, lighting=0.0),
+    "rotated": dict(count=1, scale=0.25, rotation=180, blur=0.0, noise=0.0, lighting=0.0),
+    "small":   dict(count=1, scale=0.08, rotation=30, blur=0.0, noise=0.0, lighting=0.0),
+    "blur":    dict(count=1, scale=0.2, rotation=30, blur=1.5, noise=0.0, lighting=0.0),
+    "noise":   dict(count=1, scale=0.2, rotation=30, blur=0.0, noise=12.0, lighting=0.0),
+    "dim":     dict(count=1, scale=0.2, rotation=30, blur=0.0, noise=4.0, lighting=0.7),
+    "many":    dict(count=12, scale=0.12, rotation=180, blur=0.5, noise=4.0, lighting=0.3),
+}
+
+# Temporally coherent sequences of the navigation marker, which exercise the trackers.
+# scale as above, speed the motion in px per frame and spin the rotation in deg per frame
+SEQUENCES = {
+    "moving":       dict(scale=0.2, speed=4.0, spin=1.0, blur=0.0, noise=0.0, lighting=0.0),
+    "moving_noisy": dict(scale=0.15, speed=6.0, spin=2.0, blur=0.8, noise=8.0, lighting=0.3),
+}
+
+# Ids skipped by integrate_v2, never rendered so every module sees the same ground truth
+EXCLUDED_IDS = (24, 48)
+
+# Marker followed by integrate_v2's trackers, the one moving in the sequences
+TRACKED_ID = 72
+
+# Accuracy and speed tolerances of --check against a stored baseline
+MAX_SLOWDOWN = 0.25        # Allowed drop in detection frames/s
+MAX_RECALL_DROP = 0.02
+MAX_CENTER_ERROR_RISE = 0.5  # px
+MAX_ANGLE_ERROR_RISE = 1.0   # deg
+
+# Marker image (white quiet zone included) on the new and the legacy aruco API
+def render_marker(dictionary, marker_id, side):
+    if hasattr(aruco, "generateImageMarker"):
+        return aruco.generateImageMarker(dictionary, marker_id, side)
+    return aruco.drawMarker(dictionary, marker_id, side)
+
+# Draw markers with the given ids, centers and in-plane angles (deg, positive turns
+# counter-clockwise on screen) onto a grey frame. Returns (image, corners) with the ground
+# truth corners (n, 4, 2) in the detector's order: top-left, top-right, bottom-right, bottom-left
+def draw_markers(dictionary, resolution, rng, ids, centers, angles, side, blur, noise, lighting):
+    width, height = resolution
+    image = np.full((height, width), 200, np.float32)
+    border = max(side // 6, 2)  # White quiet zone around the marker
+    patch_side = side + 2 * border
+
+    corners = np.zeros((len(ids), 4, 2), np.float32)
+    for i, (marker_id, (cx, cy), angle) in enumerate(zip(ids, centers, angles)):
+        marker = render_marker(dictionary, int(marker_id), side)
+        patch = cv2.copyMakeBorder(marker, border, border, border, border, cv2.BORDER_CONSTANT, value=255)
+
+        # Rotate and place the patch
+        transform = cv2.getRotationMatrix2D((patch_side / 2, patch_side / 2), angle, 1.0)
+        transform[:, 2] += (cx - patch_side / 2, cy - patch_side / 2)
+        warped = cv2.warpAffine(patch.astype(np.float32), transform, (width, height), flags=cv2.INTER_LINEAR,
+                                borderValue=-1)
+        mask = warped >= 0
+        image[mask] = warped[mask]
+
+        # Pixel centers sit on integer coordinates, so pixel edges are at half-integers
+        inner = border - 0.5, border + side - 0.5
+        square = np.array([[inner[0], inner[0]], [inner[1], inner[0]], [inner[1], inner[1]], [inner[0], inner[1]]])
+        corners[i] = square @ transform[:, :2].T + transform[:, 2]
+
+    if lighting > 0:
+        image *= 1.0 - lighting * np.linspace(0, 1, width, dtype=np.float32)[None, :]
+    if blur > 0:
+        image = cv2.GaussianBlur(image, (0, 0), blur)
+    if noise > 0:
+        image += rng.normal(0, noise, image.shape).astype(np.float32)
+
+    image = cv2.cvtColor(np.clip(image, 0, 255).astype(np.uint8), cv2.COLOR_GRAY2BGR)
+    return image, corners
+
+# Half extent of a rotated marker patch of the given side, plus a margin
+def patch_extent(side):
+    border = max(side // 6, 2)
+    return (side + 2 * border) * np.sqrt(2) / 2 + border
+
+# Render one synthetic frame of randomly placed markers. Returns (image, ids, corners)
+def render_scene(dictionary, resolution, rng, count, scale, rotation, blur, noise, lighting):
+    width, height = resolution
+
+    # One marker per grid cell so markers never overlap
+    columns = int(np.ceil(np.sqrt(count * width / height)))
+    rows = int(np.ceil(count / columns))
+    cell_w, cell_h = width / columns, height / rows
+    side = int(round(min(scale * height, 0.6 * min(cell_w, cell_h) / np.sqrt(2))))
+    extent = patch_extent(side)
+
+    candidates = np.setdiff1d(np.arange(250), EXCLUDED_IDS)
+    ids = rng.choice(candidates, size=count, replace=False).astype(np.int32)
+    cells = rng.permutation(rows * columns)[:count]
+
+    centers, angles = [], []
+    for cell in cells:
+        angles.append(rng.uniform(-rotation, rotation))
+        centers.append(((cell % columns + 0.5) * cell_w + rng.uniform(-1, 1) * max(cell_w / 2 - extent, 0),
+                        (cell // columns + 0.5) * cell_h + rng.uniform(-1, 1) * max(cell_h / 2 - extent, 0)))
+
+    image, corners = draw_markers(dictionary, resolution, rng, ids, centers, angles, side, blur, noise, lighting)
+    return image, ids, corners
+
+# Render `frames` consecutive frames of marker TRACKED_ID moving `speed` px and turning
+# `spin` deg per frame, bouncing off the frame edges. Returns a list of (image, ids, corners)
+def render_sequence(dictionary, resolution, rng, frames, scale, speed, spin, blur, noise, lighting):
+    width, height = resolution
+    side = int(round(scale * height))
+    extent = patch_extent(side)
+    ids = np.array([TRACKED_ID], np.int32)
+
+    center = rng.uniform((extent, extent), (width - extent, height - extent))
+    heading = rng.uniform(0, 2 * np.pi)
+    velocity = speed * np.array([np.cos(heading), np.sin(heading)])
+    angle = rng.uniform(-30, 30)
+
+    scenes = []
+    for _ in range(frames):
+        image, corners = draw_markers(dictionary, resolution, rng, ids, [center], [angle], side, blur, noise, lighting)
+        scenes.append((image, ids, corners))
+
+        center = center + velocity
+        for axis, limit in ((0, width), (1, height)):
+            if not extent <= center[axis] <= limit - extent:
+                velocity[axis] = -velocity[axis]
+                center[axis] = np.clip(center[axis], extent, limit - extent)
+        angle += spin
+    return scenes
+
+# Match detections to the ground truth by id. Returns (matched, false positives,
+# center errors (px), angle errors (deg))
+def score_detections(detections, ids, corners):
+    truth = {int(marker_id): i for i, marker_id in enumerate(ids)}
+    matched, false_positives = 0, 0
+    center_errors, angle_errors = [], []
+
+    true_centers = corners.mean(axis=1)
+    top_edges = corners[:, 1] - corners[:, 0]
+    true_angles = np.degrees(np.arctan2(top_edges[:, 1], top_edges[:, 0]))
+
+    for row, marker_id in enumerate(detections.ids.tolist()):
+        i = truth.pop(marker_id, None)
+        if i is None:
+            false_positives += 1
+            continue
+        matched += 1
+        center_errors.append(float(np.linalg.norm(detections.centers[row] - true_centers[i])))
+        angle_errors.append(abs((float(detections.angles[row]) - true_angles[i] + 180) % 360 - 180))
+    return matched, false_positives, center_errors, angle_errors
+
+# Reset the frame-to-frame state of a module's tracker stack, if it has one
+def reset_tracking(module):
+    detector = getattr(module, "detector", None)
+    if hasattr(detector, "reset"):
+        detector.reset()
+
+# Detect and annotate every scene once. Returns (detect seconds, annotate seconds,
+# detections per scene). Independent scenes reset the trackers before each scene, a
+# sequence is detected as one continuous run
+def run_pass(module, scenes, independent):
+    reset_tracking(module)
+    detect_time, annotate_time = 0.0, 0.0
+    results = []
+    for image, _, _ in scenes:
+        if independent:
+            reset_tracking(module)
+
+        start = time.perf_counter()
+        detections = module.detect_ArUco_details(image)
+        detect_time += time.perf_counter() - start
+
+        canvas = image.copy()
+        start = time.perf_counter()
+        module.mark_ArUco_image(canvas, detections)
+        annotate_time += time.perf_counter() - start
+        results.append(detections)
+    return detect_time, annotate_time, results
+
+# Benchmark one case. Times are the median over `repeats` passes, accuracy comes from
+# the first pass (the passes are deterministic)
+def run_case(module, scenes, independent, repeats):
+    # Warm up so one-off allocations are not timed
+    module.mark_ArUco_image(scenes[0][0].copy(), module.detect_ArUco_details(scenes[0][0]))
+
+    passes = [run_pass(module, scenes, independent) for _ in range(repeats)]
+    detect_time = float(np.median([p[0] for p in passes]))
+    annotate_time = float(np.median([p[1] for p in passes]))
+
+    markers, matched, false_positives = 0, 0, 0
+    center_errors, angle_errors = [], []
+    for (_, ids, corners), detections in zip(scenes, passes[0][2]):
+        found, false, centers, angles = score_detections(detections, ids, corners)
+        markers += len(ids)
+        matched += found
+        false_positives += false
+        center_errors += centers
+        angle_errors += angles
+
+    frames = len(scenes)
+    return {
+        "frames": frames,
+        "markers": markers,
+        "detect_fps": frames / detect_time,
+        "detect_ms": detect_time / frames * 1000.0,
+        "detect_ms_per_marker": detect_time / markers * 1000.0,
+        "annotate_fps": frames / annotate_time if annotate_time > 0 else float("inf"),
+        "annotate_ms": annotate_time / frames * 1000.0,
+        "recall": matched / markers,
+        "false_positives": false_positives,
+        "center_error_px": float(np.mean(center_errors)) if center_errors else None,
+        "angle_error_deg": float(np.mean(angle_errors)) if angle_errors else None,
+    }
+
+# Run every resolution and scenario on the module's own detector. A module with a
+# build_detector(tracking, flow_tracking) factory (integrate_v2) also runs the sequences
+# on its tracker stack, reported as "<case>+tracking"
+def run_benchmark(module, resolutions, scenarios, frames, seed=0, repeats=5):
+    dictionary = aruco.getPredefinedDictionary(aruco.DICT_4X4_250)
+    tracker = None
+    if hasattr(module, "build_detector"):
+        tracker = module.build_detector(tracking=True, flow_tracking=True)
+
+    results = {}
+    for resolution_name in resolutions:
+        resolution = RESOLUTIONS[resolution_name]
+        for scenario_name in scenarios:
+            name = f"{resolution_name}/{scenario_name}"
+            rng = np.random.default_rng(seed)
+            if scenario_name in SEQUENCES:
+                scenes = render_sequence(dictionary, resolution, rng, frames, **SEQUENCES[scenario_name])
+                results[name] = run_case(module, scenes, False, repeats)
+                if tracker is not None:
+                    detector, module.detector = module.detector, tracker
+                    try:
+                        results[name + "+tracking"] = run_case(module, scenes, False, repeats)
+                    finally:
+                        module.detector = detector
+            else:
+                scenes = [render_scene(dictionary, resolution, rng, **SCENARIOS[scenario_name]) for _ in range(frames)]
+                results[name] = run_case(module, scenes, True, repeats)
+    return results
+
+def print_report(results):
+    print(f"{'case':<28} {'det fps':>8} {'det ms':>7} {'ms/mk':>6} {'ann ms':>7} {'recall':>7} {'fp':>4} {'ctr px':>7} {'ang deg':>8}")
+    for name, r in results.items():
+        center = f"{r['center_error_px']:.2f}" if r["center_error_px"] is not None else "-"
+        angle = f"{r['angle_error_deg']:.2f}" if r["angle_error_deg"] is not None else "-"
+        print(f"{name:<28} {r['detect_fps']:8.1f} {r['detect_ms']:7.2f} {r['detect_ms_per_marker']:6.2f} "
+              f"{r['annotate_ms']:7.2f} {r['recall']:7.3f} {r['false_positives']:4d} {center:>7} {angle:>8}")
+
+# Compare results against a baseline, returns a list of regressions (empty when passing)
+def check_against_baseline(results, baseline):
+    failures = []
+    for name, base in baseline.items():
+        r = results.get(name)
+        if r is None:
+            failures.append(f"{name}: missing from the results")
+            continue
+        if r["detect_fps"] < base["detect_fps"] * (1 - MAX_SLOWDOWN):
+            failures.append(f"{name}: detection {r['detect_fps']:.1f} fps < baseline {base['detect_fps']:.1f} fps")
+        if r["recall"] < base["recall"] - MAX_RECALL_DROP:
+            failures.append(f"{name}: recall {r['recall']:.3f} < baseline {base['recall']:.3f}")
+        if r["false_positives"] > base["false_positives"]:
+            failures.append(f"{name}: {r['false_positives']} false positives > baseline {base['false_positives']}")
+        for key, tolerance in (("center_error_px", MAX_CENTER_ERROR_RISE), ("angle_error_deg", MAX_ANGLE_ERROR_RISE)):
+            if base[key] is not None and r[key] is not None and r[key] > base[key] + tolerance:
+                failures.append(f"{name}: {key} {r[key]:.2f} > baseline {base[key]:.2f}")
+    return failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark ArUco detection and annotation on synthetic frames")
+    parser.add_argument("--module", default="aruco", help="module providing detect_ArUco_details and mark_ArUco_image")
+    parser.add_argument("--resolutions", nargs="+", default=list(RESOLUTIONS), choices=list(RESOLUTIONS))
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS) + list(SEQUENCES),
+                        choices=list(SCENARIOS) + list(SEQUENCES))
+    parser.add_argument("--frames", type=int, default=20, help="frames per case")
+    parser.add_argument("--repeats", type=int, default=5, help="timed passes per case, the median is reported")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save-baseline", metavar="PATH", help="write the results as a JSON baseline")
+    parser.add_argument("--check", metavar="PATH", help="fail when speed or accuracy regress against a JSON baseline")
+    args = parser.parse_args()
+
+    module = importlib.import_module(args.module)
+    results = run_benchmark(module, args.resolutions, args.scenarios, args.frames, args.seed, args.repeats)
+    print_report(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline written to {args.save_baseline}")
+
+    if args.check:
+        with open(args.check) as f:
+            failures = check_against_baseline(results, json.load(f))
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        if failures:
+            exit(1)
+        print("No regressions against the baseline")
@@ -0,0 +1,153 @@
+"""
+Author: Yash Pathak [Github: vindicta07]
+Email: yashpradeeppathak@gmail.com
+Description: End-to-end command latency benchmark against the ESP32 emulator
+"""
+
+import argparse
+import importlib
+import socket
+import threading
+import time
+
+import numpy as np
+
+from command_channel import CommandChannel
+from esp32_emulator import Esp32Emulator, decode_packet
+
+# Command pattern replayed through each script's send_command
+COMMAND_PATTERN = ["F", "F", "F", "L", "L", "F", "R", "R", "F", "S"]
+
+# Scripts whose send_command is benchmarked by default
+DEFAULT_SCRIPTS = ["command", "interface", "integrate", "integrate_v2"]
+
+# UDP socket stand-in that timestamps every outgoing packet by its sequence number and
+# matches the emulator's acknowledgements to them on a background thread, so a lost or
+# reordered datagram only loses its own sample
+class TimestampingSocket:
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.settimeout(0.1)
+        self.sent_count = 0
+        self.acked_count = 0
+        self.latencies_ms = []  # Send-to-actuation latency of every acknowledged packet
+
+        self._lock = threading.Lock()
+        self._sent_at = {}  # Sequence number -> monotonic send time (ns) of the latest packet with it
+
+        self._running = True
+        self._thread = threading.Thread(target=self._ack_loop, daemon=True)
+        self._thread.start()
+
+    def sendto(self, data, address):
+        _, _, sequence = decode_packet(data)
+        with self._lock:
+            self._sent_at[sequence] = time.monotonic_ns()
+            self.sent_count += 1
+        return self.sock.sendto(data, address)
+
+    def close(self):
+        self._running = False
+        self._thread.join(timeout=1.0)
+        self.sock.close()
+
+    def _ack_loop(self):
+        while self._running:
+            try:
+                reply, _ = self.sock.recvfrom(256)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+
+            fields = reply.decode(errors="replace").split(",")
+            if len(fields) != 3 or fields[0] != "ACK":
+                continue
+            with self._lock:
+                sent_at = self._sent_at.pop(int(fields[1]), None)
+                if sent_at is not None:
+                    self.acked_count += 1
+                    self.latencies_ms.append((int(fields[2]) - sent_at) / 1e6)
+
+# Drive module.send_command at a fixed rate and measure send-to-actuation latency,
+# packet loss and the resulting command rate on the wire
+def run_benchmark(module, target, rate, duration, binary=False, settle=2.0):
+    sock = TimestampingSocket()
+    channel = CommandChannel(target[0], target[1], binary=binary, sock=sock, sequenced=True)
+
+    # Point the script's send_command at the emulator
+    previous_channel = module.channel
+    module.channel = channel
+
+    requested = int(rate * duration)
+    period = 1.0 / rate
+    start = time.perf_counter()
+    for i in range(requested):
+        module.send_command(COMMAND_PATTERN[i % len(COMMAND_PATTERN)])
+        delay = start + (i + 1) * period - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    elapsed = time.perf_counter() - start
+
+    # Wait for outstanding acknowledgements, until none arrive for `settle` seconds
+    channel.close()
+    acked = -1
+    while acked != sock.acked_count:
+        acked = sock.acked_count
+        time.sleep(settle)
+    sock.close()
+    module.channel = previous_channel
+
+    sent = sock.sent_count
+    latencies = np.array(sock.latencies_ms) if sock.latencies_ms else np.array([np.nan])
+
+    return {
+        "requested": requested,
+        "sent": sent,
+        "acked": acked,
+        "loss": 1.0 - acked / sent if sent else 0.0,
+        "requested_rate": requested / elapsed,
+        "wire_rate": sent / elapsed,
+        "p50": float(np.percentile(latencies, 50)),
+        "p95": float(np.percentile(latencies, 95)),
+        "p99": float(np.percentile(latencies, 99)),
+    }
+
+def print_report(results):
+    print(f"{'script':<14}{'cmds/s':>8}{'wire/s':>8}{'sent':>6}{'acked':>7}{'loss':>7}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for name, r in results.items():
+        print(f"{name:<14}{r['requested_rate']:>8.1f}{r['wire_rate']:>8.1f}{r['sent']:>6}{r['acked']:>7}"
+              f"{r['loss']:>7.1%}{r['p50']:>9.2f}{r['p95']:>9.2f}{r['p99']:>9.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark send-to-actuation latency against an emulated ESP32")
+    parser.add_argument("--scripts", nargs="+", default=DEFAULT_SCRIPTS, help="scripts whose send_command is driven")
+    parser.add_argument("--rate", type=float, default=30.0, help="send_command calls per second")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per script")
+    parser.add_argument("--binary", action="store_true", help="use the binary wire format")
+    parser.add_argument("--target", help="HOST:PORT of an external emulator (default: in-process emulator)")
+    parser.add_argument("--blocking", action="store_true",
+                        help="in-process emulator models the earlier firmware's blocking delay(COMMAND_DURATION)")
+    args = parser.parse_args()
+
+    emulator = None
+    if args.target:
+        host, port = args.target.rsplit(":", 1)
+        target = (host, int(port))
+    else:
+        emulator = Esp32Emulator("127.0.0.1", 0, blocking_duration=args.blocking).start()
+        target = emulator.address
+
+    results = {}
+    for name in args.scripts:
+        try:
+            module = importlib.import_module(name)
+        except ImportError as e:
+            print(f"Skipping {name}: {e}")
+            continue
+        results[name] = run_benchmark(module, target, args.rate, args.duration, args.binary)
+
+    if emulator is not None:
+        emulator.stop()
+    print_report(results)
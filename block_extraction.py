@@ -4,42 +4,135 @@ Email: yashpradeeppathak@gmail.com
 Description: Block extraction algorithm for counting blocks to remove
 """
 
+import bisect
+import sys
+
+import numpy as np
+
+# Number of distinct values in a 1-D integer array, by counting sort when the values are
+# small non-negative ids and by sorting otherwise
+def count_distinct(values):
+    if values.size == 0:
+        return 0
+    if values.min() >= 0 and values.max() < 4 * values.size + 1024:
+        return int(np.count_nonzero(np.bincount(values)))
+    return len(np.unique(values))
+
+# A block has to be removed when it lies above the lowest row holding K: every non-empty
+# cell above that row is either in K's column or in a column K overlaps from below. Empty
+# cells (0) only count when some column has a 0 above a K cell of the same column
 def count_blocks_to_remove(matrix, N, M, K):
-    blocks_to_remove = set()
-
-    # First, find all the positions of the block K
-    positions_of_k = []
-    for i in range(N):
-        for j in range(M):
-            if matrix[i][j] == K:
-                positions_of_k.append((i, j))
-
-    # Now, for each position of K, check the blocks above it
-    for i, j in positions_of_k:
-        # Check all rows above the current position
-        for row in range(i):
-            block_above = matrix[row][j]
-            blocks_to_remove.add(block_above)  # Add the block above in the same column
-
-    # Remove K from the set if it exists, since we are only interested in blocks above it
-    blocks_to_remove.discard(K)
-
-    # Now we check if any blocks in other columns are overlapping with K and are above it
-    for i, j in positions_of_k:
-        # Check all columns
-        for col in range(M):
-            if col != j:  # Only check other columns
-                for row in range(i):  # Check all rows above the current row of K
-                    if matrix[row][col] != K:  # Only consider blocks that are not K
-                        # If the block is directly above K's row, we need to check if it overlaps
-                        if matrix[row][col] == K or (row < i and matrix[row][col] != 0):
-                            blocks_to_remove.add(matrix[row][col])
-    
-    return len(blocks_to_remove)
-
-N, M = map(int, input().split())
-matrix = [list(map(int, input().split())) for _ in range(N)]
-K = int(input())
-
-result = count_blocks_to_remove(matrix, N, M, K)
-print(result)
\ No newline at end of file
+    grid = np.asarray(matrix).reshape(N, M)
+    is_k = grid == K
+
+    # Lowest row of K, nothing has to be removed when K is not in the grid
+    k_rows = np.flatnonzero(is_k.any(axis=1))
+    if len(k_rows) == 0:
+        return 0
+    bottom_row = k_rows[-1]
+
+    # Distinct blocks (other than empty cells and K itself) above the lowest row of K
+    above = grid[:bottom_row]
+    count = count_distinct(above[(above != 0) & (above != K)])
+
+    # Empty cells count once if the topmost 0 of a column is above the lowest K of that column
+    if K != 0:
+        is_zero = grid == 0
+        top_zero = np.where(is_zero.any(axis=0), is_zero.argmax(axis=0), N)
+        bottom_k = np.where(is_k.any(axis=0), N - 1 - is_k[::-1].argmax(axis=0), -1)
+        if np.any(top_zero < bottom_k):
+            count += 1
+
+    return count
+
+# Index of a grid for answering count_blocks_to_remove for many targets while blocks are
+# removed in between. Built once in O(N x M log(N x M)); each block keeps its cells and its
+# top and bottom rows, and the tops of all present blocks are kept sorted. A query is then
+# a binary search over the tops plus a pass over K's own cells, and removing a block only
+# touches that block's cells
+class BlockIndex:
+    def __init__(self, matrix, N, M):
+        self.N, self.M = N, M
+        self.grid = np.array(matrix, dtype=np.int64).reshape(N, M)
+
+        # Group the flat cell indices by block id; a stable sort keeps them in row-major order
+        flat = self.grid.ravel()
+        order = np.argsort(flat, kind="stable")
+        ids, starts = np.unique(flat[order], return_index=True)
+        ends = np.append(starts[1:], len(order))
+
+        self.cells = {}   # Block id -> flat cell indices (row-major)
+        self.top = {}     # Block id -> topmost row
+        self.bottom = {}  # Block id -> lowest row
+        for block_id, start, end in zip(ids.tolist(), starts.tolist(), ends.tolist()):
+            cells = order[start:end]
+            self.cells[block_id] = cells
+            self.top[block_id] = int(cells[0]) // M
+            self.bottom[block_id] = int(cells[-1]) // M
+
+        # Sorted tops of the blocks other than the empty cells
+        self._tops = sorted(top for block_id, top in self.top.items() if block_id != 0)
+
+        # Topmost empty row per column (N when the column has no empty cell)
+        is_zero = self.grid == 0
+        self._top_zero = np.where(is_zero.any(axis=0), is_zero.argmax(axis=0), N)
+
+    def __contains__(self, block_id):
+        return block_id in self.cells
+
+    # Same result as count_blocks_to_remove(matrix, N, M, K) on the current grid
+    def count_blocks_to_remove(self, K):
+        if K not in self.cells:
+            return 0
+        bottom_row = self.bottom[K]
+
+        # Blocks starting above the lowest row of K, not counting K itself
+        count = bisect.bisect_left(self._tops, bottom_row)
+        if K != 0 and self.top[K] < bottom_row:
+            count -= 1
+
+        # Empty cells count once if a column has a 0 above a K cell
+        if K != 0:
+            rows, cols = np.divmod(self.cells[K], self.M)
+            if np.any(self._top_zero[cols] < rows):
+                count += 1
+
+        return count
+
+    # Remove a block, its cells become empty
+    def remove(self, block_id):
+        if block_id == 0 or block_id not in self.cells:
+            raise KeyError(f"block {block_id} is not in the grid")
+
+        cells = self.cells.pop(block_id)
+        top = self.top.pop(block_id)
+        bottom = self.bottom.pop(block_id)
+        del self._tops[bisect.bisect_left(self._tops, top)]
+
+        self.grid.ravel()[cells] = 0
+        rows, cols = np.divmod(cells, self.M)
+        np.minimum.at(self._top_zero, cols, rows)
+
+        if 0 in self.cells:
+            self.cells[0] = np.sort(np.concatenate((self.cells[0], cells)))
+            self.top[0] = min(self.top[0], top)
+            self.bottom[0] = max(self.bottom[0], bottom)
+        else:
+            self.cells[0], self.top[0], self.bottom[0] = cells, top, bottom
+
+    # Order in which to retrieve every block: by lowest row, then topmost row, then id. A
+    # block X has to go before K when it starts above K's lowest row, this order respects
+    # every such constraint that is not mutual
+    def removal_order(self):
+        blocks = [block_id for block_id in self.cells if block_id != 0]
+        return sorted(blocks, key=lambda block_id: (self.bottom[block_id], self.top[block_id], block_id))
+
+if __name__ == "__main__":
+    # Read the whole input at once: N M, the N x M matrix, then K
+    data = np.fromstring(sys.stdin.buffer.read(), dtype=np.int64, sep=" ")
+    N, M = int(data[0]), int(data[1])
+    matrix = data[2:2 + N * M].reshape(N, M)
+    K = int(data[2 + N * M])
+
+    result = count_blocks_to_remove(matrix, N, M, K)
+    print(result)
@@ -0,0 +1,138 @@
+"""
+Author: Yash Pathak [Github: vindicta07]
+Email: yashpradeeppathak@gmail.com
+Description: Camera intrinsics, corner undistortion and metric marker pose estimation
+"""
+
+import argparse
+import glob
+import os
+
+import cv2
+import numpy as np
+
+# Camera intrinsics loaded once. Decisions only need the marker corners, so those are
+# undistorted directly (a few points per marker); full-frame rectification uses remap
+# tables that are built once per frame size instead of calling cv2.undistort every frame
+class CameraCalibration:
+    def __init__(self, camera_matrix, dist_coeffs, image_size=None):
+        self.camera_matrix = np.asarray(camera_matrix, dtype=np.float64).reshape(3, 3)
+        self.dist_coeffs = np.asarray(dist_coeffs, dtype=np.float64).reshape(-1)
+        self.image_size = tuple(int(v) for v in image_size) if image_size is not None else None  # (width, height)
+
+        self._maps = None
+        self._maps_size = None
+
+    # Load intrinsics saved by save() (.npz) or an OpenCV FileStorage file (.yml/.yaml/.xml)
+    # with camera_matrix and dist_coeffs nodes
+    @classmethod
+    def load(cls, path):
+        if path.endswith(".npz"):
+            data = np.load(path)
+            image_size = data["image_size"] if "image_size" in data else None
+            return cls(data["camera_matrix"], data["dist_coeffs"], image_size)
+
+        storage = cv2.FileStorage(path, cv2.FILE_STORAGE_READ)
+        if not storage.isOpened():
+            raise FileNotFoundError(f"Could not open calibration file: {path}")
+        camera_matrix = storage.getNode("camera_matrix").mat()
+        dist_coeffs = storage.getNode("dist_coeffs").mat()
+        size_node = storage.getNode("image_size")
+        image_size = size_node.mat().reshape(-1) if not size_node.empty() else None
+        storage.release()
+        if camera_matrix is None or dist_coeffs is None:
+            raise ValueError(f"{path} has no camera_matrix/dist_coeffs")
+        return cls(camera_matrix, dist_coeffs, image_size)
+
+    def save(self, path):
+        extra = {} if self.image_size is None else {"image_size": np.array(self.image_size)}
+        np.savez(path, camera_matrix=self.camera_matrix, dist_coeffs=self.dist_coeffs, **extra)
+
+    # Intrinsics scaled to another capture resolution (calibration at 1280x720 used at 640x360)
+    def scaled(self, image_size):
+        if self.image_size is None or tuple(image_size) == self.image_size:
+            return self
+        sx = image_size[0] / self.image_size[0]
+        sy = image_size[1] / self.image_size[1]
+        camera_matrix = self.camera_matrix * np.array([[sx], [sy], [1.0]])
+        return CameraCalibration(camera_matrix, self.dist_coeffs, image_size)
+
+    # Undistorted image, the remap tables are computed on the first call for a frame size
+    def rectify(self, image):
+        height, width = image.shape[:2]
+        if self._maps_size != (width, height):
+            self._maps = cv2.initUndistortRectifyMap(self.camera_matrix, self.dist_coeffs, None,
+                                                     self.camera_matrix, (width, height), cv2.CV_16SC2)
+            self._maps_size = (width, height)
+        return cv2.remap(image, self._maps[0], self._maps[1], cv2.INTER_LINEAR)
+
+    # Undistort (n, 4, 2) pixel corners. Returns normalised image coordinates (x/z, y/z)
+    # by default, or undistorted pixels with pixels=True
+    def undistort_corners(self, corners, pixels=False):
+        corners = np.asarray(corners, dtype=np.float64)
+        if corners.size == 0:
+            return corners.reshape(0, 4, 2)
+        projection = self.camera_matrix if pixels else None
+        points = cv2.undistortPoints(corners.reshape(-1, 1, 2), self.camera_matrix, self.dist_coeffs, P=projection)
+        return points.reshape(-1, 4, 2)
+
+    # Pose of every detected marker from its undistorted corners with planar square PnP
+    # (IPPE_SQUARE), which accounts for the perspective foreshortening of a marker seen at an
+    # angle. Corners are undistorted in one batch and solved in normalised coordinates.
+    # Returns (positions (n, 3) of the marker centres in metres in the camera frame,
+    # distances in metres, bearings in degrees, positive to the right of the optical axis)
+    def estimate_poses(self, corners, marker_length):
+        normalized = self.undistort_corners(corners)
+        if len(normalized) == 0:
+            return np.empty((0, 3)), np.empty(0), np.empty(0)
+
+        # Marker corners in the marker frame, in the detector's order (top-left first, clockwise)
+        half = marker_length / 2
+        square = np.array([[-half, half, 0], [half, half, 0], [half, -half, 0], [-half, -half, 0]])
+
+        positions = np.empty((len(normalized), 3))
+        for i, points in enumerate(normalized):
+            _, _, tvec = cv2.solvePnP(square, points, np.eye(3), None, flags=cv2.SOLVEPNP_IPPE_SQUARE)
+            positions[i] = tvec.reshape(3)
+        distances = np.linalg.norm(positions, axis=1)
+        bearings = np.degrees(np.arctan2(positions[:, 0], positions[:, 2]))
+        return positions, distances, bearings
+
+# Calibrate from chessboard images, e.g. a 9x6 inner-corner board with 25 mm squares
+def calibrate_from_images(paths, board_size, square_size):
+    board = np.zeros((board_size[0] * board_size[1], 3), np.float32)
+    board[:, :2] = np.mgrid[0:board_size[0], 0:board_size[1]].T.reshape(-1, 2) * square_size
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
+
+    object_points, image_points, image_size = [], [], None
+    for path in paths:
+        gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            continue
+        found, corners = cv2.findChessboardCorners(gray, board_size, None)
+        if not found:
+            continue
+        corners = cv2.cornerSubPix(gray, corners, (11, 11), (-1, -1), criteria)
+        object_points.append(board)
+        image_points.append(corners)
+        image_size = gray.shape[::-1]
+
+    if len(image_points) < 3:
+        raise ValueError(f"Chessboard found in only {len(image_points)} images, need at least 3")
+
+    error, camera_matrix, dist_coeffs, _, _ = cv2.calibrateCamera(object_points, image_points, image_size, None, None)
+    return CameraCalibration(camera_matrix, dist_coeffs, image_size), error, len(image_points)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calibrate the camera from chessboard images")
+    parser.add_argument("images", help="directory of chessboard images")
+    parser.add_argument("--board", default="9x6", help="inner corners per row x column")
+    parser.add_argument("--square", type=float, default=0.025, help="square size in metres")
+    parser.add_argument("--output", default="camera_calibration.npz")
+    args = parser.parse_args()
+
+    board_size = tuple(int(v) for v in args.board.lower().split("x"))
+    paths = sorted(glob.glob(os.path.join(args.images, "*")))
+    calibration, error, used = calibrate_from_images(paths, board_size, args.square)
+    calibration.save(args.output)
+    print(f"Calibrated from {used} images, RMS reprojection error {error:.3f} px, saved to {args.output}")
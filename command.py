@@ -4,21 +4,19 @@ Email: yashpradeeppathak@gmail.com
 Description: Simple UDP command interface for robot control using keyboard
 """
 
-import socket
 from pynput import keyboard
+from command_channel import CommandChannel, start_async_logging
 
 # IP and Port of the UDP receiver (replace with your robot's IP and port)
 UDP_IP = "192.168.1.XXX"  # Change this to the IP of your robot
 UDP_PORT = 12345           # Change this to the port you set for UDP communication
 
-# Create a UDP socket
-sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+# Shared command channel: coalesces repeated commands, sends keepalives and logs asynchronously
+channel = CommandChannel(UDP_IP, UDP_PORT)
 
 # Function to send UDP commands
-def send_command(command):
-    message = command.encode()  # Encode the command into bytes
-    sock.sendto(message, (UDP_IP, UDP_PORT))  # Send the command to the specified IP and port
-    print(f"Sent command: {command}")
+def send_command(command, speed=None):
+    channel.send(command, speed)  # Duplicates are coalesced, the channel logs what is sent
 
 # Define action on key press
 def on_press(key):
@@ -45,6 +43,14 @@ def on_release(key):
     if key == keyboard.Key.esc:
         return False
 
-# Start listening for key presses
-with keyboard.Listener(on_press=on_press, on_release=on_release) as listener:
-    listener.join()
+if __name__ == "__main__":
+    # Log sent commands from a background thread
+    log_listener = start_async_logging()
+
+    # Start listening for key presses
+    with keyboard.Listener(on_press=on_press, on_release=on_release) as listener:
+        listener.join()
+
+    # Stop the keepalive thread and flush pending log records
+    channel.close()
+    log_listener.stop()
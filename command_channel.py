@@ -0,0 +1,155 @@
+"""
+Author: Yash Pathak [Github: vindicta07]
+Email: yashpradeeppathak@gmail.com
+Description: Coalescing, rate-limited UDP command channel with text and binary wire formats
+"""
+
+import logging
+import logging.handlers
+import queue
+import socket
+import struct
+import threading
+import time
+
+# Firmware stops the motors when no command arrives within COMMAND_TIMEOUT (commanding_keyboard.ino)
+COMMAND_TIMEOUT = 2.0
+
+# Compact binary packet: magic byte, sequence number, command character, speed
+BINARY_MAGIC = 0xA5
+BINARY_PACKET = struct.Struct("<BBBB")
+
+logger = logging.getLogger("agv.command")
+
+# Route all "agv" log records through a queue so the control loop never blocks on console I/O.
+# Returns the listener, call listener.stop() on exit to flush the remaining records
+def start_async_logging(level=logging.INFO, handler=None):
+    if handler is None:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    listener.start()
+
+    agv_logger = logging.getLogger("agv")
+    agv_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    agv_logger.setLevel(level)
+    agv_logger.propagate = False
+    return listener
+
+# Encode a command in the "<COMMAND>[,<PARAMETER>]" text format. A sequence number is
+# appended as "#<sequence>" for the emulator's acknowledgements (benchmarks only, the
+# firmware does not parse it)
+def encode_text(command, speed=None, sequence=None):
+    text = command if speed is None else f"{command},{speed}"
+    if sequence is not None:
+        text += f"#{sequence}"
+    return text.encode()
+
+# Encode a single-character command as a 4-byte binary packet
+def encode_binary(command, speed=None, sequence=0):
+    return BINARY_PACKET.pack(BINARY_MAGIC, sequence & 0xFF, ord(command), (speed or 0) & 0x3F)
+
+# Shared command channel. A changed command (or speed) is sent at once; an identical
+# command is coalesced until keepalive_interval has passed, so a caller repeating it still
+# refreshes the firmware. Only a stop is repeated by the keepalive thread, every
+# keepalive_interval seconds for up to keepalive_hold seconds after the caller last asked
+# for it, so a lost "S" packet cannot leave the robot moving. Motion commands are never
+# repeated on the caller's behalf: when the caller stops sending them the robot stops after
+# COMMAND_DURATION, or at the latest at the firmware watchdog (COMMAND_TIMEOUT). Several channels
+# may share one socket (sock=...); a non-blocking socket drops a packet instead of
+# stalling the caller when its buffer is full. With sequenced=True text packets carry the
+# sequence number that binary packets always have
+class CommandChannel:
+    def __init__(self, ip, port, keepalive_interval=0.25, keepalive_hold=1.0, binary=False, sock=None,
+                 sequenced=False):
+        if not 0 < keepalive_interval < COMMAND_TIMEOUT:
+            raise ValueError(f"keepalive_interval must be between 0 and {COMMAND_TIMEOUT} seconds")
+        if not 0 <= keepalive_hold <= COMMAND_TIMEOUT:
+            raise ValueError(f"keepalive_hold must be between 0 and {COMMAND_TIMEOUT} seconds")
+
+        self.address = (ip, port)
+        self.keepalive_interval = keepalive_interval
+        self.keepalive_hold = keepalive_hold
+        self.binary = binary
+        self.sequenced = sequenced
+        self._owns_socket = sock is None
+        self.sock = sock if sock is not None else socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+        self.sent_count = 0       # Packets put on the wire, keepalives included
+        self.coalesced_count = 0  # Commands suppressed as duplicates
+        self.dropped_count = 0    # Packets a non-blocking socket could not take
+        self.on_transmit = None   # Optional on_transmit(command, speed) for every packet put on the wire
+
+        self._lock = threading.Lock()
+        self._last_command = None    # Last (command, speed) transmitted
+        self._last_sent = 0.0        # When it was transmitted
+        self._last_requested = 0.0   # When the caller last asked for it
+        self._sequence = 0
+
+        self._stop_event = threading.Event()
+        self._keepalive_thread = threading.Thread(target=self._keepalive_loop, daemon=True)
+        self._keepalive_thread.start()
+
+    # Send a command unless it repeats the last one within the keepalive interval.
+    # Returns True if a packet was transmitted
+    def send(self, command, speed=None):
+        key = (command, speed)
+        now = time.monotonic()
+
+        with self._lock:
+            self._last_requested = now
+            if key == self._last_command and now - self._last_sent < self.keepalive_interval:
+                self.coalesced_count += 1
+                return False
+            return self._transmit(key, now)
+
+    # Stop the keepalive thread (the socket is closed only if the channel created it)
+    def close(self):
+        self._stop_event.set()
+        self._keepalive_thread.join(timeout=1.0)
+        if self._owns_socket:
+            self.sock.close()
+
+    def encode(self, command, speed=None):
+        if self.binary and len(command) == 1:
+            return encode_binary(command, speed, self._sequence)
+        return encode_text(command, speed, self._sequence if self.sequenced else None)
+
+    # Caller must hold self._lock. Returns False if the socket dropped the packet, which is
+    # then not remembered so the next send retries it
+    def _transmit(self, key, now, keepalive=False):
+        command, speed = key
+        try:
+            self.sock.sendto(self.encode(command, speed), self.address)
+        except BlockingIOError:
+            self.dropped_count += 1
+            return False
+        self._sequence = (self._sequence + 1) & 0xFF
+        self._last_command = key
+        self._last_sent = now
+        self.sent_count += 1
+        if self.on_transmit is not None:
+            self.on_transmit(command, speed)
+
+        if keepalive:
+            logger.debug("Keepalive: %s", command)
+        elif speed is None:
+            logger.info("Sent command: %s", command)
+        else:
+            logger.info("Sent command: %s,%s", command, speed)
+        return True
+
+    # Repeat a stop for a while so a lost packet cannot leave the robot moving. Motion
+    # commands are not repeated, a stalled or crashed caller lets the firmware stop the robot
+    def _keepalive_loop(self):
+        while not self._stop_event.wait(self.keepalive_interval / 2):
+            now = time.monotonic()
+            with self._lock:
+                if self._last_command is None or self._last_command[0] != "S":
+                    continue
+                if now - self._last_requested > self.keepalive_hold:
+                    continue
+                if now - self._last_sent >= self.keepalive_interval:
+                    self._transmit(self._last_command, now, keepalive=True)
@@ -0,0 +1,131 @@
+"""
+Author: Yash Pathak [Github: vindicta07]
+Email: yashpradeeppathak@gmail.com
+Description: Non-blocking scheduler for timed robot command sequences
+"""
+
+import threading
+import time
+from collections import deque
+
+# Runs timed command sequences such as [("cw", 1.0), ("s", 0)] ("cw for 1 s then stop")
+# on a background thread. Starting a new sequence preempts the running one, so a newer
+# command replaces a pending stop instead of waiting behind it
+class CommandScheduler:
+    def __init__(self, send):
+        self.send = send  # Function used to transmit a command, e.g. send_command
+
+        self._cond = threading.Condition()
+        self._steps = deque()   # Pending (command, duration) steps
+        self._active = None     # Sequence currently being executed
+        self._generation = 0    # Incremented whenever a sequence is replaced or cancelled
+        self._running = True
+
+        self._thread = threading.Thread(target=self._run_loop, daemon=True)
+        self._thread.start()
+
+    # Start a sequence of (command, duration in seconds) steps, preempting any running one.
+    # Requesting the sequence that is already running is ignored unless restart is set
+    def run(self, steps, restart=False):
+        steps = tuple(steps)
+        with self._cond:
+            if steps == self._active and not restart:
+                return
+            self._steps = deque(steps)
+            self._active = steps
+            self._generation += 1
+            self._cond.notify_all()
+
+    # Drop the running sequence and its pending steps without sending anything
+    def cancel(self):
+        with self._cond:
+            self._steps.clear()
+            self._active = None
+            self._generation += 1
+            self._cond.notify_all()
+
+    # True while a sequence is being executed
+    def is_busy(self):
+        with self._cond:
+            return self._active is not None
+
+    # Stop the scheduler thread
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._thread.join(timeout=1.0)
+
+    def _run_loop(self):
+        while True:
+            with self._cond:
+                while self._running and not self._steps:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                command, duration = self._steps.popleft()
+                generation = self._generation
+
+            self.send(command)
+            deadline = time.monotonic() + duration
+
+            with self._cond:
+                # Hold the command for its duration unless a newer sequence preempts it
+                while self._running and self._generation == generation:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                # Sequence finished without being replaced
+                if self._generation == generation and not self._steps:
+                    self._active = None
+
+# One long-lived timer thread holding a single resettable deadline. Every reset() pushes
+# the deadline forward and the callback fires once, when the latest deadline expires
+class DeadlineTimer:
+    def __init__(self, callback):
+        self.callback = callback
+
+        self._cond = threading.Condition()
+        self._deadline = None
+        self._running = True
+
+        self._thread = threading.Thread(target=self._run_loop, daemon=True)
+        self._thread.start()
+
+    # (Re)arm the timer to fire delay seconds from now
+    def reset(self, delay):
+        with self._cond:
+            self._deadline = time.monotonic() + delay
+            self._cond.notify_all()
+
+    # Disarm the timer without firing
+    def cancel(self):
+        with self._cond:
+            self._deadline = None
+            self._cond.notify_all()
+
+    # Stop the timer thread
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._thread.join(timeout=1.0)
+
+    def _run_loop(self):
+        while True:
+            with self._cond:
+                while self._running:
+                    if self._deadline is None:
+                        self._cond.wait()
+                        continue
+                    remaining = self._deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if not self._running:
+                    return
+                self._deadline = None
+
+            self.callback()
@@ -29,6 +29,17 @@ DataParser dataParser;
 unsigned long lastCommandTime = 0;  // Stores the last time a command was received
 const unsigned long COMMAND_TIMEOUT = 2000;  // 2 seconds timeout (adjust if needed)
 const unsigned long COMMAND_DURATION = 500;   // 0.5 seconds duration for each command
+const int DEFAULT_SPEED = 60;                 // Speed used when a command carries no speed field
+
+// Motion stop deadline, checked in loop() so the packet callback never blocks
+bool commandActive = false;
+unsigned long commandStartTime = 0;
+
+// Compact binary packets: magic byte, sequence number, command character, speed
+#define BINARY_MAGIC 0xA5
+#define BINARY_PACKET_SIZE 4
+uint8_t lastSequence = 0;
+bool haveSequence = false;
 
 // Enum definitions for UART control
 typedef enum {
@@ -108,9 +119,13 @@ void setup() {
     Serial.print("UDP Listening on IP: ");
     Serial.println(WiFi.localIP());
     udp.onPacket([](AsyncUDPPacket packet) {
-      String incomingData = (char*)packet.data();
-      dataParser.parseData(incomingData, ',');
-      handleParsedData(); // Function to handle the parsed data
+      if (packet.length() == BINARY_PACKET_SIZE && packet.data()[0] == BINARY_MAGIC) {
+        handleBinaryPacket(packet.data());
+      } else {
+        String incomingData = (char*)packet.data();
+        dataParser.parseData(incomingData, ',');
+        handleParsedData(); // Function to handle the parsed data
+      }
       lastCommandTime = millis();  // Update the last command time when data is received
     });
   }
@@ -125,6 +140,12 @@ void ps_handler(void *data) {
 
 // Main loop function
 void loop() {
+  // Stop the motors once the current command has run for COMMAND_DURATION
+  if (commandActive && millis() - commandStartTime > COMMAND_DURATION) {
+    stop();
+    commandActive = false;
+  }
+
   // Check if the timeout has been exceeded
   if (millis() - lastCommandTime > COMMAND_TIMEOUT) {
     stop();  // Stop the motors if no command received within the timeout period
@@ -133,18 +154,18 @@ void loop() {
 }
 
 // Motor control functions
-void forwards() {
-  uart1Write(UART_SIG_LCHAN, UART_SIG_CW, 60);
-  uart2Write(UART_SIG_LCHAN, UART_SIG_CW, 60);
-  uart1Write(UART_SIG_RCHAN, UART_SIG_CCW, 60);
-  uart2Write(UART_SIG_RCHAN, UART_SIG_CCW, 60);
+void forwards(uint8_t speed) {
+  uart1Write(UART_SIG_LCHAN, UART_SIG_CW, speed);
+  uart2Write(UART_SIG_LCHAN, UART_SIG_CW, speed);
+  uart1Write(UART_SIG_RCHAN, UART_SIG_CCW, speed);
+  uart2Write(UART_SIG_RCHAN, UART_SIG_CCW, speed);
 }
 
-void backwards() {
-  uart1Write(UART_SIG_LCHAN, UART_SIG_CCW, 60);
-  uart2Write(UART_SIG_LCHAN, UART_SIG_CCW, 60);
-  uart1Write(UART_SIG_RCHAN, UART_SIG_CW, 60);
-  uart2Write(UART_SIG_RCHAN, UART_SIG_CW, 60);
+void backwards(uint8_t speed) {
+  uart1Write(UART_SIG_LCHAN, UART_SIG_CCW, speed);
+  uart2Write(UART_SIG_LCHAN, UART_SIG_CCW, speed);
+  uart1Write(UART_SIG_RCHAN, UART_SIG_CW, speed);
+  uart2Write(UART_SIG_RCHAN, UART_SIG_CW, speed);
 }
 
 void turnright() {
@@ -182,18 +203,18 @@ void stop() {
   uart2Write(UART_SIG_RCHAN, UART_SIG_CCW, 0);
 }
 
-void forw_right() {                    // Perfect Right
-  uart1Write(UART_SIG_LCHAN, UART_SIG_CCW, 60);
-  uart2Write(UART_SIG_LCHAN, UART_SIG_CCW, 60);
-  uart1Write(UART_SIG_RCHAN, UART_SIG_CCW, 60);
-  uart2Write(UART_SIG_RCHAN, UART_SIG_CCW, 60);
+void forw_right(uint8_t speed) {                    // Perfect Right
+  uart1Write(UART_SIG_LCHAN, UART_SIG_CCW, speed);
+  uart2Write(UART_SIG_LCHAN, UART_SIG_CCW, speed);
+  uart1Write(UART_SIG_RCHAN, UART_SIG_CCW, speed);
+  uart2Write(UART_SIG_RCHAN, UART_SIG_CCW, speed);
 }
 
-void forw_left() {               // Perfect Left
-  uart1Write(UART_SIG_LCHAN, UART_SIG_CW, 60);
-  uart2Write(UART_SIG_LCHAN, UART_SIG_CW, 60);
-  uart1Write(UART_SIG_RCHAN, UART_SIG_CW, 60);
-  uart2Write(UART_SIG_RCHAN, UART_SIG_CW, 60);
+void forw_left(uint8_t speed) {               // Perfect Left
+  uart1Write(UART_SIG_LCHAN, UART_SIG_CW, speed);
+  uart2Write(UART_SIG_LCHAN, UART_SIG_CW, speed);
+  uart1Write(UART_SIG_RCHAN, UART_SIG_CW, speed);
+  uart2Write(UART_SIG_RCHAN, UART_SIG_CW, speed);
 }
 
 void back_right() {
@@ -210,33 +231,56 @@ void back_left() {
   uart2Write(UART_SIG_RCHAN, UART_SIG_CW, 0);
 }
 
-// Function to handle parsed data
+// Function to handle parsed data ("<COMMAND>[,<PARAMETER>]" text format)
 void handleParsedData() {
-  String command = dataParser.getField(0);
-  int speed = dataParser.getField(1).toInt();
+  handleCommand(dataParser.getField(0), dataParser.getField(1).toInt());
+}
+
+// Function to handle a binary packet
+void handleBinaryPacket(const uint8_t* data) {
+  uint8_t sequence = data[1];
+
+  // Drop packets older than the last accepted one, the sequence restarts after a timeout
+  if (millis() - lastCommandTime > COMMAND_TIMEOUT) {
+    haveSequence = false;
+  }
+  if (haveSequence && (int8_t)(sequence - lastSequence) <= 0) {
+    return;
+  }
+  lastSequence = sequence;
+  haveSequence = true;
+
+  handleCommand(String((char)data[2]), data[3] & 0x3F);
+}
+
+// Function to execute a command
+void handleCommand(String command, int speed) {
+  // Commands without a speed field (or speed 0) use the default speed
+  uint8_t motorSpeed = speed > 0 ? speed : DEFAULT_SPEED;
 
   // Stop the previous command if it was active
   stop();
 
   if (command == "F") {
-    forwards();
+    forwards(motorSpeed);
     Serial.println("FORWARD");
   } else if (command == "B") {
-    backwards();
+    backwards(motorSpeed);
     Serial.println("BACKWARD");
   } else if (command == "L") {
-    forw_left();
+    forw_left(motorSpeed);
     Serial.println("LEFT");
   } else if (command == "R") {
-    forw_right();
+    forw_right(motorSpeed);
     Serial.println("RIGHT");
   } else if (command == "S") {
     stop();
     Serial.println("STOP");
   }
 
-  // Set a timer to stop the motors after COMMAND_DURATION milliseconds
+  // Stop the motors after COMMAND_DURATION milliseconds unless a newer command arrives;
+  // loop() checks the deadline so a 50 Hz command stream is handled without queueing
   lastCommandTime = millis();  // Update the last command time when data is received
-  delay(COMMAND_DURATION);      // Wait for 0.5 seconds
-  stop();                       // Stop the motors after 0.5 seconds
+  commandStartTime = lastCommandTime;
+  commandActive = command != "S";
 }
@@ -0,0 +1,159 @@
+"""
+Author: Yash Pathak [Github: vindicta07]
+Email: yashpradeeppathak@gmail.com
+Description: Fixed-rate proportional marker-following controller, decoupled from the camera frame rate
+"""
+
+import threading
+import time
+
+MAX_SPEED = 63  # Speed field range accepted by the firmware (6 bits)
+
+def clamp(value, low, high):
+    return max(low, min(high, value))
+
+# Follows a marker at a fixed control rate (50 Hz by default). The vision loop hands over the
+# latest detections with update(); between frames the steering error and remaining distance
+# are extrapolated from their recent velocity. Each tick emits a command with a speed field:
+# "L,<speed>"/"R,<speed>" proportional to the steering error, "F,<speed>" proportional to the
+# remaining distance, or "S". Without a calibration the error and distance come from the
+# marker's pixel position and size (stop at stop_size, or at stop_fraction of the frame width
+# when given, which holds across capture resolutions); with a CameraCalibration they come
+# from its bearing (degrees) and distance (metres, stop at stop_distance)
+class ProportionalController:
+    def __init__(self, send, target_id=72, rate=50.0, stop_size=200.0, stop_fraction=None,
+                 steer_gain=1.5, steer_deadband=0.15, drive_gain=1.0, min_speed=12,
+                 max_extrapolation=0.2, lost_timeout=0.3, speed_step=4, velocity_smoothing=0.5,
+                 calibration=None, marker_length=0.10, stop_distance=0.5, slow_distance=1.5, max_bearing=30.0):
+        self.send = send                          # send(command, speed=None), e.g. send_command
+        self.target_id = target_id
+        self.period = 1.0 / rate
+        self.stop_size = stop_size                # Marker diagonal (px) at which the robot stops
+        self.stop_fraction = stop_fraction        # ... or diagonal / frame width, overrides stop_size
+        self.steer_gain = steer_gain
+        self.steer_deadband = steer_deadband      # Normalised error below which the robot drives straight
+        self.drive_gain = drive_gain
+        self.min_speed = min_speed
+        self.max_extrapolation = max_extrapolation
+        self.lost_timeout = lost_timeout          # Stop when the marker was not seen for this long
+        self.speed_step = speed_step              # Speeds are quantised so repeated commands coalesce
+        self.velocity_smoothing = velocity_smoothing
+
+        # Calibrated mode
+        self.calibration = calibration
+        self.marker_length = marker_length        # Printed marker side (m)
+        self.stop_distance = stop_distance        # Stop at this distance (m)
+        self.slow_distance = slow_distance        # Full speed beyond stop_distance + slow_distance (m)
+        self.max_bearing = max_bearing            # Bearing (deg) giving full steering error
+
+        self.active = False  # Commands are only sent while active
+
+        self._lock = threading.Lock()
+        self._observation = None  # (time, steering error, remaining distance fraction)
+        self._velocity = (0.0, 0.0)
+        self._last_seen = None
+        self._running = False
+        self._thread = None
+        self._next_tick = None  # Deadline of the next advance() tick
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._control_loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    # Steering error (negative when the marker is to the left, 1 = full) and remaining
+    # distance (0 = stop, 1 = full speed) of the target marker
+    def measure(self, detections, row, frame_width):
+        if self.calibration is not None:
+            _, distances, bearings = self.calibration.estimate_poses(detections.corners[row:row + 1], self.marker_length)
+            error = float(bearings[0]) / self.max_bearing
+            remaining = (float(distances[0]) - self.stop_distance) / self.slow_distance
+        else:
+            half_width = frame_width / 2
+            stop_size = self.stop_size if self.stop_fraction is None else self.stop_fraction * frame_width
+            error = (float(detections.centers[row, 0]) - half_width) / half_width
+            remaining = (stop_size - float(detections.sizes[row])) / stop_size
+        return error, remaining
+
+    # Feed the latest MarkerDetections of a frame captured at `timestamp` (monotonic seconds)
+    def update(self, detections, frame_width, timestamp=None):
+        now = time.monotonic() if timestamp is None else timestamp
+        if self.target_id not in detections:
+            return
+        error, remaining = self.measure(detections, detections.row(self.target_id), frame_width)
+
+        with self._lock:
+            if self._observation is not None and now - self._last_seen <= self.lost_timeout:
+                previous_time, previous_error, previous_remaining = self._observation
+                dt = now - previous_time
+                if dt > 0:
+                    a = self.velocity_smoothing
+                    v_error = (error - previous_error) / dt
+                    v_remaining = (remaining - previous_remaining) / dt
+                    self._velocity = (a * v_error + (1 - a) * self._velocity[0],
+                                      a * v_remaining + (1 - a) * self._velocity[1])
+            else:
+                self._velocity = (0.0, 0.0)
+
+            self._observation = (now, error, remaining)
+            self._last_seen = now
+
+    # Command for the current instant as (command, speed)
+    def compute_command(self, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self._observation is None or now - self._last_seen > self.lost_timeout:
+                return "S", None
+            observed_at, error, remaining = self._observation
+            v_error, v_remaining = self._velocity
+
+        # Extrapolate between frames, bounded so a dropped frame cannot run away
+        dt = clamp(now - observed_at, 0.0, self.max_extrapolation)
+        error = clamp(error + v_error * dt, -1.0, 1.0)
+        remaining += v_remaining * dt
+
+        if remaining <= 0:
+            return "S", None
+
+        if abs(error) > self.steer_deadband:
+            speed = self._speed(self.steer_gain * abs(error))
+            return ("L" if error < 0 else "R"), speed
+
+        return "F", self._speed(self.drive_gain * remaining)
+
+    def _speed(self, fraction):
+        speed = clamp(fraction, 0.0, 1.0) * MAX_SPEED
+        speed = int(round(speed / self.speed_step) * self.speed_step)
+        return int(clamp(speed, self.min_speed, MAX_SPEED))
+
+    # Run the ticks due before `now` on a caller-supplied clock instead of the control thread,
+    # for frames with known capture times (replay). Commands are only sent while active
+    def advance(self, now):
+        if self._next_tick is None:
+            self._next_tick = now
+        while self._next_tick < now:
+            if self.active:
+                command, speed = self.compute_command(self._next_tick)
+                self.send(command, speed)
+            self._next_tick += self.period
+
+    # Fixed-rate loop, ticks are scheduled on absolute deadlines so jitter does not accumulate
+    def _control_loop(self):
+        next_tick = time.monotonic()
+        while self._running:
+            if self.active:
+                command, speed = self.compute_command()
+                self.send(command, speed)
+
+            next_tick += self.period
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.monotonic()  # Overran a tick, resynchronise
@@ -0,0 +1,96 @@
+"""
+Author: Yash Pathak [Github: vindicta07]
+Email: yashpradeeppathak@gmail.com
+Description: Decoupled annotation and display thread with render decimation
+"""
+
+import threading
+import time
+
+import cv2
+
+# Annotates and shows frames on its own thread so GUI stalls never delay the control loop.
+# submit() only stores a reference to the newest frame; the worker draws on a copy at most
+# max_fps times per second and frames submitted in between are dropped.
+# Note: OpenCV windows on a background thread work on Linux and Windows, not on macOS
+class DisplayWorker:
+    def __init__(self, window_name, annotate, max_fps=15.0, headless=False, timer=None):
+        self.window_name = window_name
+        self.annotate = annotate  # annotate(image, detections) -> image
+        self.min_interval = 1.0 / max_fps
+        self.headless = headless  # Headless operation skips drawing entirely
+        self.timer = timer        # Optional StageTimer for the annotate/display stages
+
+        self.quit_requested = threading.Event()  # Set when 'q' is pressed in the window
+        self.rendered_frames = 0
+        self.dropped_frames = 0
+
+        self._cond = threading.Condition()
+        self._pending = None
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        if self.headless:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._render_loop, daemon=True)
+        self._thread.start()
+        return self
+
+    # Hand a frame and its detections to the display thread, never blocks
+    def submit(self, frame, detections):
+        if self.headless:
+            return
+        with self._cond:
+            if self._pending is not None:
+                self.dropped_frames += 1
+            self._pending = (frame, detections)
+            self._cond.notify()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            cv2.destroyAllWindows()
+
+    def _render_loop(self):
+        next_render = 0.0
+        while True:
+            with self._cond:
+                if not self._running:
+                    return
+
+                item = None
+                now = time.monotonic()
+                if self._pending is not None and now >= next_render:
+                    item, self._pending = self._pending, None
+                else:
+                    # Wake up regularly so the window keeps processing GUI events
+                    timeout = 0.05 if self._pending is None else min(0.05, next_render - now)
+                    self._cond.wait(timeout)
+
+            if item is not None:
+                next_render = time.monotonic() + self.min_interval
+                frame, detections = item
+                self._render(frame.copy(), detections)
+            elif cv2.waitKey(1) & 0xFF == ord('q'):
+                self.quit_requested.set()
+
+    def _render(self, image, detections):
+        if self.timer is not None:
+            with self.timer.stage("annotate"):
+                image = self.annotate(image, detections)
+            with self.timer.stage("display"):
+                cv2.imshow(self.window_name, image)
+                key = cv2.waitKey(1) & 0xFF
+        else:
+            image = self.annotate(image, detections)
+            cv2.imshow(self.window_name, image)
+            key = cv2.waitKey(1) & 0xFF
+
+        self.rendered_frames += 1
+        if key == ord('q'):
+            self.quit_requested.set()
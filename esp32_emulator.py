@@ -0,0 +1,170 @@
+"""
+Author: Yash Pathak [Github: vindicta07]
+Email: yashpradeeppathak@gmail.com
+Description: Local stand-in for the commanding_keyboard.ino UDP receiver, for benchmarking without a robot
+"""
+
+import argparse
+import queue
+import socket
+import threading
+import time
+
+from command_channel import BINARY_MAGIC, BINARY_PACKET
+
+# Timing constants from commanding_keyboard.ino (seconds)
+COMMAND_TIMEOUT = 2.0
+COMMAND_DURATION = 0.5
+LOOP_DELAY = 0.02
+
+# Commands handled by handleParsedData, everything else leaves the motors stopped
+MOTION_COMMANDS = {"F": "FORWARD", "B": "BACKWARD", "L": "LEFT", "R": "RIGHT", "S": "STOP"}
+
+# Split a text packet the way DataParser::parseData does (strtok skips empty fields)
+def parse_fields(data, delimiter=","):
+    return [field for field in data.split(delimiter) if field]
+
+# Decode a text or binary packet into (command, speed, sequence). The sequence number is
+# None for text packets sent without one
+def decode_packet(payload):
+    if len(payload) == BINARY_PACKET.size and payload[0] == BINARY_MAGIC:
+        _, sequence, command, speed = BINARY_PACKET.unpack(payload)
+        return chr(command), speed & 0x3F, sequence
+
+    text, _, suffix = payload.decode(errors="replace").partition("#")
+    sequence = int(suffix) if suffix.isdigit() else None
+    fields = parse_fields(text)
+    command = fields[0] if fields else ""
+    try:
+        speed = int(fields[1]) if len(fields) > 1 else 0
+    except ValueError:
+        speed = 0  # String::toInt() returns 0 for non-numeric input
+    return command, speed, sequence
+
+# Emulates the firmware: an AsyncUDP receive queue feeding handleParsedData, plus the
+# COMMAND_TIMEOUT watchdog in loop(). Every actuated packet is acknowledged to the sender
+# with "ACK,<sequence>,<actuation time in monotonic ns>", echoing the packet's sequence
+# number (-1 for text packets without one) so losses and reordering cannot mismatch them
+class Esp32Emulator:
+    def __init__(self, host="0.0.0.0", port=12345, blocking_duration=False, queue_size=16):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.settimeout(0.1)
+        self.address = self.sock.getsockname()
+
+        # The firmware stops the motors from loop() once COMMAND_DURATION has passed.
+        # blocking_duration=True models the earlier firmware, which called delay(COMMAND_DURATION)
+        # inside the packet callback and stalled packet handling
+        self.blocking_duration = blocking_duration
+
+        self.state = "STOP"
+        self.received_count = 0
+        self.actuated_count = 0
+        self.dropped_count = 0   # Packets dropped because the receive queue was full
+        self.timeout_stops = 0   # Stops issued by the watchdog
+
+        self._packets = queue.Queue(maxsize=queue_size)
+        self._last_command_time = time.monotonic()
+        self._stop_deadline = None
+        self._lock = threading.Lock()
+        self._running = False
+        self._threads = []
+
+    def start(self):
+        self._running = True
+        for target in (self._receive_loop, self._handler_loop, self._watchdog_loop):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self._running = False
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self.sock.close()
+
+    def _receive_loop(self):
+        while self._running:
+            try:
+                payload, sender = self.sock.recvfrom(1024)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+
+            self.received_count += 1
+            try:
+                self._packets.put_nowait((payload, sender))
+            except queue.Full:
+                self.dropped_count += 1
+
+    def _handler_loop(self):
+        while self._running:
+            try:
+                payload, sender = self._packets.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self._handle_packet(payload, sender)
+
+    # Mirrors handleParsedData(): stop, run the command, acknowledge, then stop again
+    # after COMMAND_DURATION
+    def _handle_packet(self, payload, sender):
+        command, speed, sequence = decode_packet(payload)
+
+        with self._lock:
+            self.state = MOTION_COMMANDS.get(command, "STOP")
+            self.actuated_count += 1
+            self._last_command_time = time.monotonic()
+            actuated_at = time.monotonic_ns()
+
+        try:
+            self.sock.sendto(f"ACK,{-1 if sequence is None else sequence},{actuated_at}".encode(), sender)
+        except OSError:
+            pass
+
+        if self.blocking_duration:
+            time.sleep(COMMAND_DURATION)
+            with self._lock:
+                self.state = "STOP"
+        else:
+            with self._lock:
+                self._stop_deadline = time.monotonic() + COMMAND_DURATION
+
+    # Mirrors loop(): stop the motors when no command arrived within COMMAND_TIMEOUT
+    def _watchdog_loop(self):
+        while self._running:
+            now = time.monotonic()
+            with self._lock:
+                if self._stop_deadline is not None and now >= self._stop_deadline:
+                    self._stop_deadline = None
+                    self.state = "STOP"
+                if now - self._last_command_time > COMMAND_TIMEOUT and self.state != "STOP":
+                    self.state = "STOP"
+                    self.timeout_stops += 1
+            time.sleep(LOOP_DELAY)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Emulate the ESP32 UDP command receiver")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=12345)
+    parser.add_argument("--blocking", action="store_true",
+                        help="model the earlier firmware's delay(COMMAND_DURATION) in the packet callback")
+    args = parser.parse_args()
+
+    emulator = Esp32Emulator(args.host, args.port, blocking_duration=args.blocking).start()
+    print(f"Emulated ESP32 listening on UDP {emulator.address[0]}:{emulator.address[1]}")
+
+    try:
+        last_state = None
+        while True:
+            if emulator.state != last_state:
+                last_state = emulator.state
+                print(last_state)
+            time.sleep(LOOP_DELAY)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulator.stop()
+        print(f"Received {emulator.received_count}, actuated {emulator.actuated_count}, "
+              f"dropped {emulator.dropped_count}, timeout stops {emulator.timeout_stops}")
@@ -0,0 +1,234 @@
+"""
+Author: Yash Pathak [Github: vindicta07]
+Email: yashpradeeppathak@gmail.com
+Description: Multi-robot fleet runner sharing one process, one detection worker pool and one UDP socket
+"""
+
+import argparse
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from camera_calibration import CameraCalibration
+from command_channel import CommandChannel, start_async_logging
+from control_loop import ProportionalController
+from frame_grabber import LatestFrameGrabber
+from marker_detector import MarkerDetector, MarkerDetections
+from marker_tracker import RoiMarkerTracker
+from replay import parse_source
+
+DEFAULT_PORT = 12345
+DEFAULT_STOP_FRACTION = 200 / 640  # Marker diagonal / frame width at which a robot stops
+
+logger = logging.getLogger("agv.fleet")
+
+# Split "ip[:port]" into (ip, port)
+def parse_address(address):
+    ip, _, port = address.partition(":")
+    return ip, int(port) if port else DEFAULT_PORT
+
+# Read the fleet config, a JSON file of the form
+#   {"robots": [{"name": "agv1", "source": 0, "address": "192.168.1.50:12345", "marker_id": 72}, ...]}
+# Optional per-robot keys: stop_fraction (marker diagonal / frame width to stop at), and
+# calibration (intrinsics file) with marker_length and stop_distance in metres for
+# calibrated mode. Returns one dict per robot with every key filled in
+def load_fleet_config(path):
+    with open(path) as f:
+        config = json.load(f)
+
+    robots = []
+    for i, entry in enumerate(config["robots"]):
+        robots.append({
+            "name": entry.get("name", f"robot{i}"),
+            "source": parse_source(str(entry["source"])),
+            "address": parse_address(entry["address"]),
+            "marker_id": int(entry.get("marker_id", 72)),
+            "stop_fraction": float(entry.get("stop_fraction", DEFAULT_STOP_FRACTION)),
+            "calibration": entry.get("calibration"),
+            "marker_length": float(entry.get("marker_length", 0.10)),
+            "stop_distance": float(entry.get("stop_distance", 0.5)),
+        })
+    return robots
+
+# Everything that belongs to one robot: its camera, detector and tracker state, command
+# channel and controller. Nothing is shared between robots except the socket and the pool
+class RobotState:
+    def __init__(self, name, source, address, marker_id, sock, stop_fraction=DEFAULT_STOP_FRACTION,
+                 calibration=None, marker_length=0.10, stop_distance=0.5):
+        self.name = name
+        self.marker_id = marker_id
+        self.calibration = CameraCalibration.load(calibration) if calibration else None
+
+        self.cap = cv2.VideoCapture(source)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"{name}: could not open video source {source!r}")
+        self.grabber = LatestFrameGrabber(self.cap)
+
+        self.detector = RoiMarkerTracker(MarkerDetector(), tracked_ids=[marker_id])
+        self.channel = CommandChannel(address[0], address[1], sock=sock)
+        self.controller = ProportionalController(self.channel.send, target_id=marker_id, stop_fraction=stop_fraction,
+                                                 calibration=self.calibration, marker_length=marker_length,
+                                                 stop_distance=stop_distance)
+        self._frame_size = None
+
+        self.processed_frames = 0
+        self.detected_frames = 0  # Frames in which the target marker was found
+        self.processing_time = 0.0
+
+    # Detection and controller update for one frame, runs on a pool worker
+    def process(self, frame):
+        start = time.perf_counter()
+
+        # Intrinsics calibrated at another resolution are rescaled to the capture size
+        frame_size = (frame.shape[1], frame.shape[0])
+        if self.calibration is not None and frame_size != self._frame_size:
+            self.controller.calibration = self.calibration.scaled(frame_size)
+        self._frame_size = frame_size
+
+        corners, ids = self.detector.detect(frame)
+        detections = MarkerDetections.from_detection(corners, ids)
+        self.controller.update(detections, frame.shape[1])
+
+        self.processed_frames += 1
+        if self.marker_id in detections:
+            self.detected_frames += 1
+        self.processing_time += time.perf_counter() - start
+        return detections
+
+    def close(self):
+        self.grabber.stop()
+        self.cap.release()
+        self.channel.close()
+
+# Runs several robots in one interpreter. Each camera has a capture thread and a feeder
+# thread that hands its newest frame to a detection pool sized to the CPU count, with at
+# most one frame per robot in flight. OpenCV releases the GIL while detecting, so the pool
+# runs in parallel while OpenCV and the interpreter are loaded only once. A single control
+# thread ticks every robot's controller at the control rate, and all commands leave through
+# one non-blocking UDP socket
+class FleetRunner:
+    def __init__(self, robots, workers=None, rate=50.0, navigate=False):
+        self.workers = workers or os.cpu_count() or 1
+        self.period = 1.0 / rate
+        self.navigate = navigate  # Send commands, otherwise only detect
+
+        # Parallelism comes from the pool, keep OpenCV from oversubscribing the cores
+        cv2.setNumThreads(1)
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+
+        self.robots = []
+        try:
+            for robot in robots:
+                self.robots.append(RobotState(robot["name"], robot["source"], robot["address"],
+                                              robot["marker_id"], self.sock,
+                                              stop_fraction=robot["stop_fraction"],
+                                              calibration=robot["calibration"],
+                                              marker_length=robot["marker_length"],
+                                              stop_distance=robot["stop_distance"]))
+        except Exception:
+            self.close()
+            raise
+
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="detect")
+        self._stop_event = threading.Event()
+        self._threads = []
+
+    def run(self, duration=None):
+        for robot in self.robots:
+            robot.controller.active = self.navigate
+            robot.grabber.start()
+            thread = threading.Thread(target=self._feed, args=(robot,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        control_thread = threading.Thread(target=self._control_loop, daemon=True)
+        control_thread.start()
+
+        start = time.monotonic()
+        try:
+            while any(thread.is_alive() for thread in self._threads):
+                if duration is not None and time.monotonic() - start >= duration:
+                    break
+                time.sleep(0.1)
+        except KeyboardInterrupt:
+            pass
+
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        control_thread.join(timeout=1.0)
+        return time.monotonic() - start
+
+    # Feed one robot's newest frames to the pool, one at a time
+    def _feed(self, robot):
+        while not self._stop_event.is_set():
+            ret, frame = robot.grabber.read(timeout=0.5)
+            if not ret:
+                if not robot.grabber.running:
+                    logger.info("%s: video source ended", robot.name)
+                    return
+                continue
+            try:
+                self.pool.submit(robot.process, frame).result()
+            except Exception:
+                logger.exception("%s: detection failed", robot.name)
+
+    # One thread drives every controller at the control rate
+    def _control_loop(self):
+        next_tick = time.monotonic()
+        while not self._stop_event.is_set():
+            if self.navigate:
+                for robot in self.robots:
+                    command, speed = robot.controller.compute_command()
+                    robot.channel.send(command, speed)
+
+            next_tick += self.period
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.monotonic()
+
+    def close(self):
+        if self.navigate:
+            for robot in self.robots:
+                robot.channel.send("S")
+        for robot in self.robots:
+            robot.close()
+        if hasattr(self, "pool"):
+            self.pool.shutdown(wait=True)
+        self.sock.close()
+
+def print_summary(runner, elapsed):
+    print(f"{len(runner.robots)} robots, {runner.workers} detection workers, {elapsed:.1f} s")
+    for robot in runner.robots:
+        mean_ms = robot.processing_time / robot.processed_frames * 1000.0 if robot.processed_frames else 0.0
+        print(f"  {robot.name}: {robot.processed_frames} frames ({robot.processed_frames / elapsed:.1f} fps, "
+              f"{mean_ms:.1f} ms/frame), marker {robot.marker_id} in {robot.detected_frames}, "
+              f"dropped {robot.grabber.dropped_frames} stale frames, sent {robot.channel.sent_count} packets")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run marker navigation for several robots in one process")
+    parser.add_argument("config", help="JSON fleet config with (source, address, marker_id) entries")
+    parser.add_argument("--workers", type=int, help="detection workers (default: CPU count)")
+    parser.add_argument("--rate", type=float, default=50.0, help="control rate in Hz")
+    parser.add_argument("--navigate", action="store_true", help="send navigation commands to the robots")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    args = parser.parse_args()
+
+    log_listener = start_async_logging()
+    runner = FleetRunner(load_fleet_config(args.config), workers=args.workers, rate=args.rate, navigate=args.navigate)
+    try:
+        elapsed = runner.run(args.duration)
+    finally:
+        runner.close()
+        log_listener.stop()
+    print_summary(runner, elapsed)
@@ -0,0 +1,125 @@
+"""
+Author: Yash Pathak [Github: vindicta07]
+Email: yashpradeeppathak@gmail.com
+Description: Shared-memory frame ring buffer for a multi-process vision pipeline
+"""
+
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+HEADER_FIELDS = 8  # latest sequence, slot count, height, width, channels, reserved
+
+# Open an existing shared memory block without tracking it, only the creating process
+# unlinks it. Before Python 3.13 the block is tracked anyway, which is harmless for
+# multiprocessing children since they share the creator's resource tracker
+def attach_shared_memory(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+# Zero-copy frame bus. One writer publishes frames into a ring of fixed-size slots in shared
+# memory; any number of reader processes look at the newest slot without pickling. Every
+# slot carries the sequence number of the frame it holds (-1 while being written), so a
+# reader can tell a complete frame from one being overwritten. The writer never waits for
+# readers, slow consumers simply skip frames
+class FrameBus:
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+
+        self._header = np.ndarray((HEADER_FIELDS,), np.int64, shm.buf, 0)
+        self.slots, height, width, channels = (int(v) for v in self._header[1:5])
+        self.shape = (height, width, channels)
+
+        offset = HEADER_FIELDS * 8
+        self._slot_seq = np.ndarray((self.slots,), np.int64, shm.buf, offset)
+        offset += self.slots * 8
+        self._slot_time = np.ndarray((self.slots,), np.float64, shm.buf, offset)
+        offset += self.slots * 8
+        self._frames = np.ndarray((self.slots,) + self.shape, np.uint8, shm.buf, offset)
+
+        self._next_seq = int(self._header[0]) + 1
+
+    # Create a new bus for frames of the given (height, width, channels) shape
+    @classmethod
+    def create(cls, shape, slots=8, name=None):
+        height, width, channels = shape
+        size = HEADER_FIELDS * 8 + slots * 16 + slots * height * width * channels
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        header = np.ndarray((HEADER_FIELDS,), np.int64, shm.buf, 0)
+        header[:] = 0
+        header[0] = -1  # No frame published yet
+        header[1:5] = (slots, height, width, channels)
+        np.ndarray((slots,), np.int64, shm.buf, HEADER_FIELDS * 8)[:] = -1
+        return cls(shm, owner=True)
+
+    # Attach to a bus created by another process
+    @classmethod
+    def attach(cls, name):
+        return cls(attach_shared_memory(name), owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    # Sequence number of the newest complete frame (-1 before the first one)
+    def latest_seq(self):
+        return int(self._header[0])
+
+    # Copy a frame into the next slot. Never blocks on readers
+    def publish(self, frame, timestamp=None):
+        seq = self._next_seq
+        slot = seq % self.slots
+
+        self._slot_seq[slot] = -1  # Mark the slot as being written
+        np.copyto(self._frames[slot], frame.reshape(self.shape))
+        self._slot_time[slot] = time.time() if timestamp is None else timestamp
+        self._slot_seq[slot] = seq
+        self._header[0] = seq
+
+        self._next_seq += 1
+        return seq
+
+    # Newest frame as (seq, timestamp, frame) or None. With copy=False the frame is a view
+    # into shared memory that stays valid until the writer wraps around the ring; check
+    # is_current(seq) after using it
+    def read_latest(self, after_seq=-1, copy=False):
+        seq = int(self._header[0])
+        if seq < 0 or seq <= after_seq:
+            return None
+
+        slot = seq % self.slots
+        if self._slot_seq[slot] != seq:
+            return None  # Overwritten while we looked, the caller will retry
+
+        timestamp = float(self._slot_time[slot])
+        frame = self._frames[slot].copy() if copy else self._frames[slot]
+        if copy and not self.is_current(seq):
+            return None
+        return seq, timestamp, frame
+
+    # Block (polling) until a frame newer than after_seq is available or timeout expires
+    def wait_latest(self, after_seq=-1, copy=False, timeout=None, poll_interval=0.001):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            item = self.read_latest(after_seq, copy)
+            if item is not None:
+                return item
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(poll_interval)
+
+    # True while the slot of frame `seq` still holds that frame
+    def is_current(self, seq):
+        return self._slot_seq[seq % self.slots] == seq
+
+    def close(self):
+        # Drop the numpy views before closing the mapping
+        del self._header, self._slot_seq, self._slot_time, self._frames
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
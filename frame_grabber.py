@@ -0,0 +1,88 @@
+"""
+Author: Yash Pathak [Github: vindicta07]
+Email: yashpradeeppathak@gmail.com
+Description: Threaded latest-frame-wins capture stage for the vision loops
+"""
+
+import threading
+import cv2
+
+# Reads frames from a cv2.VideoCapture on its own thread and keeps only the newest one,
+# so the detection loop never works on frames that queued up in the driver
+class LatestFrameGrabber:
+    def __init__(self, cap):
+        self.cap = cap
+        self.dropped_frames = 0  # Frames replaced before the consumer picked them up
+
+        self._cond = threading.Condition()
+        self._frame = None
+        self._frame_seq = 0  # Sequence number of the newest captured frame
+        self._read_seq = 0   # Sequence number of the last frame handed to the consumer
+        self._running = False
+        self._thread = None
+        self._resolution = None  # Pending (width, height) request, applied by the capture thread
+
+    # Start the capture thread
+    def start(self):
+        # Keep the driver-side queue as short as the backend allows
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        self._running = True
+        self._thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def _capture_loop(self):
+        while self._running:
+            # VideoCapture is not thread-safe, so property changes are made on this thread
+            resolution, self._resolution = self._resolution, None
+            if resolution is not None:
+                self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, resolution[0])
+                self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, resolution[1])
+
+            ret, frame = self.cap.read()
+
+            with self._cond:
+                if not ret:
+                    # End of stream or camera failure, wake up the consumer
+                    self._running = False
+                    self._cond.notify_all()
+                    break
+
+                # The previous frame was never read, it is now stale
+                if self._frame_seq != self._read_seq:
+                    self.dropped_frames += 1
+
+                self._frame = frame
+                self._frame_seq += 1
+                self._cond.notify_all()
+
+    # Block until a frame newer than the last one returned is available.
+    # Returns (ret, frame) like cv2.VideoCapture.read()
+    def read(self, timeout=None):
+        with self._cond:
+            self._cond.wait_for(lambda: self._frame_seq != self._read_seq or not self._running, timeout)
+
+            if self._frame_seq == self._read_seq:
+                return False, None
+
+            self._read_seq = self._frame_seq
+            return True, self._frame
+
+    # False once the stream ended or stop() was called
+    @property
+    def running(self):
+        return self._running
+
+    # Ask the capture thread to switch the camera to another resolution before its next read.
+    # Cameras that do not support it keep their resolution, check the frame shape
+    def request_resolution(self, width, height):
+        self._resolution = (int(width), int(height))
+
+    # Stop the capture thread (the VideoCapture itself is released by the caller)
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
@@ -4,107 +4,93 @@ Email: yashpradeeppathak@gmail.com
 Description: ArUco marker detection and robot control integration
 """
 
+import argparse
 import cv2
-from cv2 import aruco
 import numpy as np
-import math
-import socket
-import time
+from command_channel import CommandChannel, start_async_logging
+from marker_detector import MarkerDetector, MarkerDetections
+from frame_grabber import LatestFrameGrabber
+from command_scheduler import CommandScheduler
+from stage_timer import StageTimer
+from display_worker import DisplayWorker
 
 # IP and Port of the UDP receiver (replace with your robot's IP and port)
 UDP_IP = "192.168.1.XXX"  # Change this to the IP of your robot
 UDP_PORT = 12345           # Change this to the port you set for UDP communication
 
-# Create a UDP socket
-sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+# Shared command channel: coalesces repeated commands, sends keepalives and logs asynchronously
+channel = CommandChannel(UDP_IP, UDP_PORT)
 
-# Function to send UDP commands
-def send_command(command):
-    message = command.encode()  # Encode the command into bytes
-    sock.sendto(message, (UDP_IP, UDP_PORT))  # Send the command to the specified IP and port
-    print(f"Sent command: {command}")
-
-# Detect ArUco markers and retrieve details
-def detect_ArUco_details(image):
-    ArUco_details_dict = {}
-    ArUco_corners = {}
-    
-    # Define the ArUco dictionary (DICT_4X4_250 in this case)
-    aruco_dict = cv2.aruco.getPredefinedDictionary(aruco.DICT_4X4_250)
-
-    # Detect ArUco markers in the input image
-    corners, ids, _ = aruco.detectMarkers(image, aruco_dict)
-
-    # Check if ArUco markers were detected
-    if ids is not None:
-        for i in range(len(ids)):
-            # Extract the ArUco marker ID (cast to an integer)
-            id = int(ids[i][0])
+# Rolling per-stage latency histograms for the vision-to-command loop
+timer = StageTimer()
 
-            # Extract the corner coordinates of the detected marker
-            corner_coordinates = corners[i][0]
+# Function to send UDP commands
+def send_command(command, speed=None):
+    with timer.stage("send"):
+        channel.send(command, speed)  # Duplicates are coalesced, the channel logs what is sent
 
-            # Calculate the center of the marker by taking the mean of x and y coordinates
-            center_x = int(np.mean(corner_coordinates[:, 0]))
-            center_y = int(np.mean(corner_coordinates[:, 1]))
+# Background scheduler for timed command sequences
+scheduler = CommandScheduler(send_command)
 
-            # Calculate the angle from the vertical axis
-            angle = int(math.degrees(math.atan2(corner_coordinates[1][1] - corner_coordinates[0][1],
-                                                corner_coordinates[1][0] - corner_coordinates[0][0])))
+# Shared ArUco detector, built once and reused for every frame
+detector = MarkerDetector()
 
-            # Store the details in dictionaries
-            ArUco_details_dict[id] = [[center_x, center_y], angle]
-            ArUco_corners[id] = corner_coordinates
+# Detect ArUco markers and return their geometry as a MarkerDetections result
+def detect_ArUco_details(image):
+    # Detect ArUco markers in the input image using the shared detector
+    corners, ids = detector.detect(image)
 
-    return ArUco_details_dict, ArUco_corners 
+    # Centers, angles and sizes for all markers are computed in one vectorized pass
+    return MarkerDetections.from_detection(corners, ids)
 
 # Mark detected ArUco markers on the image
-def mark_ArUco_image(image, ArUco_details_dict, ArUco_corners):
-    for ids, details in ArUco_details_dict.items():
-        center = details[0]
+def mark_ArUco_image(image, detections):
+    # Integer pixel positions for all markers at once
+    centers = detections.centers.astype(int).tolist()
+    corners = detections.corners.astype(int).tolist()
+    tl_tr_centers = ((detections.corners[:, 0] + detections.corners[:, 1]) / 2).astype(int)
+    display_offsets = np.hypot(*(tl_tr_centers - detections.centers.astype(int)).T).astype(int).tolist()
+    angles = detections.angles.astype(int).tolist()
+    tl_tr_centers = tl_tr_centers.tolist()
+
+    for i, ids in enumerate(detections.ids.tolist()):
+        center = centers[i]
         cv2.circle(image, center, 5, (0,0,255), -1)
 
-        corner = ArUco_corners[int(ids)]
-        cv2.circle(image, (int(corner[0][0]), int(corner[0][1])), 5, (50, 50, 50), -1)
-        cv2.circle(image, (int(corner[1][0]), int(corner[1][1])), 5, (0, 255, 0), -1)
-        cv2.circle(image, (int(corner[2][0]), int(corner[2][1])), 5, (128, 0, 255), -1)
-        cv2.circle(image, (int(corner[3][0]), int(corner[3][1])), 5, (25, 255, 255), -1)
+        corner = corners[i]
+        cv2.circle(image, corner[0], 5, (50, 50, 50), -1)
+        cv2.circle(image, corner[1], 5, (0, 255, 0), -1)
+        cv2.circle(image, corner[2], 5, (128, 0, 255), -1)
+        cv2.circle(image, corner[3], 5, (25, 255, 255), -1)
 
-        tl_tr_center_x = int((corner[0][0] + corner[1][0]) / 2)
-        tl_tr_center_y = int((corner[0][1] + corner[1][1]) / 2) 
-
-        cv2.line(image,center,(tl_tr_center_x, tl_tr_center_y),(255,0,0),5)
-        display_offset = int(math.sqrt((tl_tr_center_x - center[0])**2+(tl_tr_center_y - center[1])**2))
+        cv2.line(image,center,tl_tr_centers[i],(255,0,0),5)
+        display_offset = display_offsets[i]
         cv2.putText(image,str(ids),(center[0]+int(display_offset/2),center[1]),cv2.FONT_HERSHEY_COMPLEX, 1, (0, 0, 255), 2)
-        angle = details[1]
+        angle = angles[i]
         cv2.putText(image,str(angle),(center[0]-display_offset,center[1]),cv2.FONT_HERSHEY_COMPLEX, 1, (0, 255, 0), 2)
     return image
 
 # Handle ArUco-based robot control
-def handle_robot_movement(ArUco_details_dict):
-    for marker_id in ArUco_details_dict:
+# Timed manoeuvres run on the scheduler thread so the video loop never sleeps
+def handle_robot_movement(detections):
+    for marker_id in detections:
         if marker_id == 24:
-            send_command("cw")  # Clockwise
-            time.sleep(1)
-            send_command("s")  # Stop after 1 second
+            scheduler.run([("cw", 1.0), ("s", 0)])  # Clockwise, stop after 1 second
         elif marker_id == 48:
-            send_command("ccw")  # Counter-clockwise
-            time.sleep(1)
-            send_command("s")  # Stop after 1 second
+            scheduler.run([("ccw", 1.0), ("s", 0)])  # Counter-clockwise, stop after 1 second
         elif marker_id == 72:
-            send_command("s")  # Stop the robot
+            scheduler.run([("s", 0)])  # Stop the robot, replacing any pending manoeuvre
 
 # Draw a bounding box that changes color when an ArUco marker is detected inside it
-def draw_bounding_box(image, ArUco_details_dict, box_top_left, box_bottom_right):
+def draw_bounding_box(image, detections, box_top_left, box_bottom_right):
     box_color = (0, 255, 0)  # Default green color
     box_thickness = 2
 
-    # Check if any ArUco marker is inside the bounding box
-    for ids, details in ArUco_details_dict.items():
-        center = details[0]
-        if box_top_left[0] <= center[0] <= box_bottom_right[0] and box_top_left[1] <= center[1] <= box_bottom_right[1]:
-            box_color = (0, 0, 255)  # Change color to red if ArUco is inside the box
-            break
+    # Check if any ArUco marker is inside the bounding box (all centers at once)
+    centers = detections.centers.astype(int)
+    inside = np.all((centers >= box_top_left) & (centers <= box_bottom_right), axis=1)
+    if inside.any():
+        box_color = (0, 0, 255)  # Change color to red if ArUco is inside the box
 
     # Draw the bounding box
     cv2.rectangle(image, box_top_left, box_bottom_right, box_color, box_thickness)
@@ -112,42 +98,77 @@ def draw_bounding_box(image, ArUco_details_dict, box_top_left, box_bottom_right)
 
 # Real-time video capture and processing
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ArUco marker detection and robot control")
+    parser.add_argument("--overlay", action="store_true", help="draw FPS and stage latencies on the frame")
+    parser.add_argument("--timings", metavar="PATH", help="write stage latency percentiles to a .json or .csv file on exit")
+    parser.add_argument("--headless", action="store_true", help="run without a window, skipping all drawing")
+    parser.add_argument("--display-fps", type=float, default=15.0, help="maximum rate of the annotated preview")
+    args = parser.parse_args()
+
+    # Log sent commands from a background thread instead of printing in the loop
+    log_listener = start_async_logging()
+
     cap = cv2.VideoCapture(0)  # Capture from webcam
 
     if not cap.isOpened():
         print("Error: Could not open video stream.")
         exit()
 
+    # Capture frames on a separate thread, keeping only the newest one
+    grabber = LatestFrameGrabber(cap).start()
+
     # Define the bounding box coordinates (top-left and bottom-right)
     box_top_left = (200, 150)  # Modify based on your frame size
     box_bottom_right = (400, 350)  # Modify based on your frame size
 
-    while True:
-        ret, frame = cap.read()
-
-        if not ret:
-            print("Failed to grab frame")
-            break
-
-        # Detect ArUco markers
-        ArUco_details_dict, ArUco_corners = detect_ArUco_details(frame)
+    # Mark the ArUco markers, the bounding box and the optional overlay on a display copy
+    def annotate(image, detections):
+        image = mark_ArUco_image(image, detections)
+        image = draw_bounding_box(image, detections, box_top_left, box_bottom_right)
+        if args.overlay:
+            timer.draw_overlay(image)
+        return image
+
+    # Annotation and display run on their own thread at a lower rate
+    display = DisplayWorker("Aruco Marker Detection with Bounding Box", annotate,
+                            max_fps=args.display_fps, headless=args.headless, timer=timer).start()
+
+    try:
+        while True:
+            # Wait for the newest frame, stale frames are dropped by the grabber
+            with timer.stage("capture"):
+                ret, frame = grabber.read()
+
+            if not ret:
+                print("Failed to grab frame")
+                break
+
+            # Detect ArUco markers
+            with timer.stage("detect"):
+                detections = detect_ArUco_details(frame)
         
-        # Mark the ArUco markers on the frame
-        frame = mark_ArUco_image(frame, ArUco_details_dict, ArUco_corners)
-
-        # Handle robot movement based on detected ArUco markers
-        handle_robot_movement(ArUco_details_dict)
-
-        # Draw bounding box that changes color when an ArUco is inside
-        frame = draw_bounding_box(frame, ArUco_details_dict, box_top_left, box_bottom_right)
-
-        # Display the frame
-        cv2.imshow("Aruco Marker Detection with Bounding Box", frame)
-
-        # Exit on 'q' key press
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
-
-    # Release video capture object and close windows
-    cap.release()
-    cv2.destroyAllWindows()
+            # Handle robot movement based on detected ArUco markers
+            with timer.stage("control"):
+                handle_robot_movement(detections)
+
+            # Hand the frame to the display thread, the control loop never waits on rendering
+            display.submit(frame, detections)
+            timer.tick()
+
+            # Exit on 'q' key press
+            if display.quit_requested.is_set():
+                break
+    except KeyboardInterrupt:
+        pass  # Ctrl-C is the way out in headless mode
+    finally:
+        # Stop the capture thread, close the window and release video capture object
+        grabber.stop()
+        display.stop()
+        print(f"Dropped {grabber.dropped_frames} stale frames")
+        scheduler.stop()
+        cap.release()
+        send_command("S")  # Leave the robot stopped
+        channel.close()
+        log_listener.stop()
+        if args.timings:
+            timer.dump(args.timings)
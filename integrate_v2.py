@@ -4,114 +4,194 @@ Email: yashpradeeppathak@gmail.com
 Description: Advanced ArUco marker detection with keyboard control and navigation
 """
 
+import argparse
+import logging
+import time
 import cv2
-from cv2 import aruco
 import numpy as np
-import math
-import socket
-from pynput import keyboard
+try:
+    from pynput import keyboard
+except ImportError:
+    keyboard = None  # No display available, only headless replay can run
+from command_channel import CommandChannel, start_async_logging
+from marker_detector import MarkerDetector, MarkerDetections
+from frame_grabber import LatestFrameGrabber
+from marker_tracker import RoiMarkerTracker, FlowMarkerTracker
+from replay import CommandRecorder, run_replay, print_summary, source_fps
+from stage_timer import StageTimer
+from display_worker import DisplayWorker
+from control_loop import ProportionalController
+from camera_calibration import CameraCalibration
+from resolution_governor import ResolutionGovernor
+from session_recorder import SessionLog, VideoRecorder
 
 # IP and Port of the UDP receiver (replace with your robot's IP and port)
 UDP_IP = "192.168.1.XXX"  # Change this to the IP of your robot
 UDP_PORT = 12345           # Change this to the port you set for UDP communication
 
-# Create a UDP socket
-sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+# Per-frame navigation decisions are logged at debug level
+logger = logging.getLogger("agv.navigation")
 
-# Function to send UDP commands
-def send_command(command):
-    message = command.encode()  # Encode the command into bytes
-    sock.sendto(message, (UDP_IP, UDP_PORT))  # Send the command to the specified IP and port
-    print(f"Sent command: {command}")
-
-# Detect ArUco markers and retrieve details
-def detect_ArUco_details(image):
-    ArUco_details_dict = {}
-    ArUco_corners = {}
-    
-    # Define the ArUco dictionary (DICT_4X4_250 in this case)
-    aruco_dict = cv2.aruco.getPredefinedDictionary(aruco.DICT_4X4_250)
-
-    # Detect ArUco markers in the input image
-    corners, ids, _ = aruco.detectMarkers(image, aruco_dict)
+# Shared command channel: coalesces repeated commands, sends keepalives and logs asynchronously
+channel = CommandChannel(UDP_IP, UDP_PORT)
 
-    # Check if ArUco markers were detected
-    if ids is not None:
-        for i in range(len(ids)):
-            # Extract the ArUco marker ID (cast to an integer)
-            id = int(ids[i][0])
+# Rolling per-stage latency histograms for the vision-to-command loop
+timer = StageTimer()
 
-            # Skip ArUco markers with IDs 24 and 48
-            if id in [24, 48]:
-                continue
+# Session log of frames, detections and commands, set up by --record. Commands are logged
+# by the channel as they go on the wire, so coalesced duplicates are not recorded
+session_log = None
 
-            # Extract the corner coordinates of the detected marker
-            corner_coordinates = corners[i][0]
-
-            # Calculate the center of the marker by taking the mean of x and y coordinates
-            center_x = int(np.mean(corner_coordinates[:, 0]))
-            center_y = int(np.mean(corner_coordinates[:, 1]))
-
-            # Store the details in dictionaries
-            ArUco_details_dict[id] = [center_x, center_y, corner_coordinates]
-            ArUco_corners[id] = corner_coordinates
+# Function to send UDP commands
+def send_command(command, speed=None):
+    with timer.stage("send"):
+        channel.send(command, speed)  # Duplicates are coalesced, the channel logs what is sent
+
+# Tracking mode (--tracking): search only around the last known position of the navigation
+# marker, with a full-frame scan as soon as it is missed there and every 30 frames. Other
+# markers are not reported in tracking mode except on the full-scan frames
+TRACKING_MODE = False
+
+# Hybrid mode (--flow-tracking): run full detection every FLOW_DETECT_INTERVAL frames and
+# follow the corners of marker 72 with optical flow in between; a degraded track forces a
+# detection
+FLOW_TRACKING = False
+FLOW_DETECT_INTERVAL = 5
+
+# Detection scale: 0.5 or 0.25 finds markers on a downscaled frame and refines the corners
+# at full resolution, e.g. to run the camera at 1080p without full-resolution detection cost
+DETECTION_SCALE = 1.0
+
+# ArUco detector for the selected modes, optionally wrapped in the trackers
+def build_detector(tracking=TRACKING_MODE, flow_tracking=FLOW_TRACKING):
+    detector = MarkerDetector(downscale=DETECTION_SCALE)
+    if tracking:
+        detector = RoiMarkerTracker(detector, tracked_ids=[72], full_scan_interval=30)
+    if flow_tracking:
+        detector = FlowMarkerTracker(detector, tracked_ids=[72], detect_interval=FLOW_DETECT_INTERVAL)
+    return detector
+
+# Shared ArUco detector, built once and reused for every frame
+detector = build_detector()
+
+# Adaptive resolution (--adaptive-resolution): step the capture resolution and detection
+# stride down when frames take longer than FRAME_BUDGET_MS (and back up when there is
+# headroom), and allow a lower resolution while marker 72 is close
+ADAPTIVE_RESOLUTION = False
+FRAME_BUDGET_MS = 20.0
+
+# Calibrated mode: point this at intrinsics written by camera_calibration.py (or pass
+# --calibration) to make stop and steer decisions in metres and degrees instead of pixels
+CALIBRATION_FILE = None
+MARKER_LENGTH = 0.10   # Printed side length of marker 72 in metres
+STOP_DISTANCE = 0.5    # Stop when marker 72 is this close, in metres
+STEER_BEARING = 10.0   # Turn when marker 72 is more than this many degrees off-centre
+
+calibration = CameraCalibration.load(CALIBRATION_FILE) if CALIBRATION_FILE else None
+
+# Stop when the diagonal of marker 72 spans this fraction of the frame width (200 px at
+# 640x480), so the stop point does not move when the governor changes the resolution
+STOP_FRACTION = 200 / 640
+
+# Fixed 50 Hz proportional controller for marker 72, fed the latest detections by the vision
+# loop (replay ticks it on the recording's clock through drive_controller); the per-frame
+# handle_robot_movement below is kept for callers that decide on every frame
+controller = ProportionalController(send_command, target_id=72, rate=50.0, stop_fraction=STOP_FRACTION,
+                                    calibration=calibration, marker_length=MARKER_LENGTH,
+                                    stop_distance=STOP_DISTANCE)
+
+# Detect ArUco markers and return their geometry as a MarkerDetections result
+def detect_ArUco_details(image):
+    # Detect ArUco markers in the input image using the shared detector
+    corners, ids = detector.detect(image)
+    detections = MarkerDetections.from_detection(corners, ids)
 
-    return ArUco_details_dict, ArUco_corners 
+    # Skip ArUco markers with IDs 24 and 48
+    return detections.select(~np.isin(detections.ids, [24, 48]))
 
 # Mark detected ArUco markers on the image
-def mark_ArUco_image(image, ArUco_details_dict, ArUco_corners):
-    for ids, details in ArUco_details_dict.items():
-        center = details[0:2]
+def mark_ArUco_image(image, detections):
+    centers = detections.centers.astype(int).tolist()
+    corners = detections.corners.astype(np.int32)
+
+    for i, ids in enumerate(detections.ids.tolist()):
+        center = centers[i]
         cv2.circle(image, tuple(center), 5, (0, 0, 255), -1)
 
-        corner = ArUco_corners[int(ids)]
-        cv2.polylines(image, [np.int32(corner)], True, (0, 255, 0), 2)
+        cv2.polylines(image, [corners[i]], True, (0, 255, 0), 2)
 
         cv2.putText(image, str(ids), (center[0], center[1] - 10), cv2.FONT_HERSHEY_COMPLEX, 1, (255, 0, 0), 2)
     return image
 
 # Handle ArUco-based robot control
-def handle_robot_movement(ArUco_details_dict, frame_width, frame_height):
+def handle_robot_movement(detections, frame_width, frame_height):
     # Only focus on marker 72
-    if 72 in ArUco_details_dict:
+    if 72 in detections:
         marker_id = 72
-        center_x, center_y, corners = ArUco_details_dict[marker_id]
+        row = detections.row(marker_id)
+
+        # Calibrated mode: decide on the metric distance and bearing of the marker
+        if calibration is not None:
+            _, distances, bearings = calibration.estimate_poses(detections.corners[row:row + 1], MARKER_LENGTH)
+            distance, bearing = float(distances[0]), float(bearings[0])
+            if distance <= STOP_DISTANCE:
+                send_command("S")
+                logger.debug("Stopping for marker %d (%.2f m)", marker_id, distance)
+            elif bearing < -STEER_BEARING:
+                send_command("L")
+                logger.debug("Turning left towards marker %d (%.1f deg)", marker_id, bearing)
+            elif bearing > STEER_BEARING:
+                send_command("R")
+                logger.debug("Turning right towards marker %d (%.1f deg)", marker_id, bearing)
+            else:
+                send_command("F")
+                logger.debug("Moving forward towards marker %d (%.2f m)", marker_id, distance)
+            return
+
+        center_x = int(detections.centers[row, 0])
 
-        # Calculate the size of the marker using the distance between the diagonal corners
-        marker_size = math.sqrt((corners[0][0] - corners[2][0])**2 + (corners[0][1] - corners[2][1])**2)
+        # Size of the marker (distance between the diagonal corners)
+        marker_size = float(detections.sizes[row])
 
         # Determine the threshold for stopping the robot (based on the size of the marker)
-        threshold_size = 200  # Adjust this based on your needs
+        threshold_size = STOP_FRACTION * frame_width
 
         # Check if the marker size exceeds the threshold
         if marker_size >= threshold_size:
             send_command("S")  # Stop if the marker is large enough (close)
-            print(f"Stopping for marker {marker_id} (size: {marker_size})")
+            logger.debug("Stopping for marker %d (size: %.1f)", marker_id, marker_size)
         else:
             # Determine the direction to move based on the marker's position in the frame
             if center_x < frame_width // 3:
                 send_command("L")  # Turn left if the marker is on the left side
-                print(f"Turning left towards marker {marker_id}")
+                logger.debug("Turning left towards marker %d", marker_id)
             elif center_x > 2 * frame_width // 3:
                 send_command("R")  # Turn right if the marker is on the right side
-                print(f"Turning right towards marker {marker_id}")
+                logger.debug("Turning right towards marker %d", marker_id)
             else:
                 send_command("F")  # Move forward if the marker is centered
-                print(f"Moving forward towards marker {marker_id} (size: {marker_size})")
+                logger.debug("Moving forward towards marker %d (size: %.1f)", marker_id, marker_size)
     else:
         # Stop if marker 72 is not detected
         send_command("S")
-        print("Marker 72 not detected, stopping.")
+        logger.debug("Marker 72 not detected, stopping.")
+
+# Drive the proportional controller with frames on their own clock (replay): the
+# controller's fixed-rate ticks up to the frame's capture time are issued on that clock,
+# then the frame's detections are handed over. Live navigation runs the controller on its
+# own thread and only calls controller.update()
+def drive_controller(detections, frame_width, timestamp):
+    controller.advance(timestamp)
+    controller.update(detections, frame_width, timestamp)
 
 # Keyboard control functions
 def on_press(key):
-    global aruco_navigation
     try:
         if key.char == 'a':  # Start ArUco navigation
-            aruco_navigation = True
+            controller.active = True
             print("ArUco navigation started.")
         elif key.char == 's':  # Stop ArUco navigation
-            aruco_navigation = False
+            controller.active = False
             send_command("S")  # Stop any movement
             print("ArUco navigation stopped.")
     except AttributeError:
@@ -140,46 +220,175 @@ def on_release(key):
 
 # Real-time video capture
 if __name__ == "__main__":
-    cap = cv2.VideoCapture(0)  # Capture from webcam
+    parser = argparse.ArgumentParser(description="ArUco navigation with keyboard control")
+    parser.add_argument("--replay", metavar="SOURCE",
+                        help="headless replay of a video file or image directory instead of the webcam")
+    parser.add_argument("--log", default="replay_log.npz",
+                        help="columnar detection and command log written in replay mode")
+    parser.add_argument("--overlay", action="store_true", help="draw FPS and stage latencies on the frame")
+    parser.add_argument("--timings", metavar="PATH", help="write stage latency percentiles to a .json or .csv file on exit")
+    parser.add_argument("--headless", action="store_true", help="run without a window, skipping all drawing")
+    parser.add_argument("--display-fps", type=float, default=15.0, help="maximum rate of the annotated preview")
+    parser.add_argument("--calibration", metavar="PATH", help="camera intrinsics for metric distance and bearing")
+    parser.add_argument("--record", metavar="PREFIX",
+                        help="record the session to PREFIX.avi and a binary PREFIX.agvlog of detections and commands")
+    parser.add_argument("--record-annotated", action="store_true", help="record annotated instead of raw frames")
+    parser.add_argument("--record-fps", type=float, default=30.0)
+    parser.add_argument("--tracking", action="store_true", default=TRACKING_MODE,
+                        help="search for marker 72 around its last position between full scans "
+                             "(other markers are only reported on full scans)")
+    parser.add_argument("--flow-tracking", action="store_true", default=FLOW_TRACKING,
+                        help="follow marker 72 with optical flow between detections")
+    parser.add_argument("--adaptive-resolution", action="store_true", default=ADAPTIVE_RESOLUTION,
+                        help="adapt the capture resolution and detection stride to FRAME_BUDGET_MS")
+    args = parser.parse_args()
+
+    if args.tracking != TRACKING_MODE or args.flow_tracking != FLOW_TRACKING:
+        detector = build_detector(args.tracking, args.flow_tracking)
+
+    if args.calibration:
+        calibration = CameraCalibration.load(args.calibration)
+        controller.calibration = calibration
+
+    # Headless mode: run detection on every frame as fast as possible, recording the commands
+    # instead of sending them. Frame k counts as captured at k / fps, and the controller ticks
+    # at its control rate on that clock, as it would live
+    if args.replay:
+        channel.close()
+        channel = CommandRecorder()
+        replay_fps = source_fps(args.replay)
+        controller.active = True
+        summary = run_replay(args.replay, detect_ArUco_details,
+                             control=lambda detections, frame: drive_controller(
+                                 detections, frame.shape[1], channel.frame_index / replay_fps),
+                             recorder=channel, log_path=args.log)
+        print_summary(summary)
+        exit()
 
-    if not cap.isOpened():
-        print("Error: Could not open video stream.")
+    if keyboard is None:
+        print("Error: keyboard control needs pynput and a display, use --replay for headless mode.")
         exit()
 
-    # Start listening for keyboard inputs in a separate thread
-    listener = keyboard.Listener(on_press=on_press, on_release=on_release)
-    listener.start()
+    # Log sent commands from a background thread instead of printing in the loop
+    log_listener = start_async_logging()
 
-    # Global variable for ArUco navigation
-    aruco_navigation = False
+    cap = cv2.VideoCapture(0)  # Capture from webcam
 
-    while True:
-        ret, frame = cap.read()
+    if not cap.isOpened():
+        print("Error: Could not open video stream.")
+        exit()
 
-        if not ret:
-            print("Failed to grab frame")
-            break
+    # Capture frames on a separate thread, keeping only the newest one
+    grabber = LatestFrameGrabber(cap).start()
 
-        # Get frame dimensions
-        frame_height, frame_width, _ = frame.shape
+    # Mark the ArUco markers and the optional overlay on a display copy
+    def annotate(image, detections):
+        image = mark_ArUco_image(image, detections)
+        if args.overlay:
+            timer.draw_overlay(image)
+        return image
 
-        # Detect ArUco markers
-        ArUco_details_dict, ArUco_corners = detect_ArUco_details(frame)
+    # Annotation and display run on their own thread at a lower rate
+    display = DisplayWorker("Aruco Marker Detection with Bounding Box", annotate,
+                            max_fps=args.display_fps, headless=args.headless, timer=timer).start()
 
-        # Handle robot movement based on detected ArUco markers
-        if aruco_navigation:
-            handle_robot_movement(ArUco_details_dict, frame_width, frame_height)
+    # Session recording: the loop only queues frames and packs log records, the video is
+    # encoded and the log written on background threads
+    recorder = None
+    if args.record:
+        session_log = SessionLog(args.record + ".agvlog")
+        channel.on_transmit = session_log.log_command
+        recorder = VideoRecorder(args.record + ".avi", fps=args.record_fps, session_log=session_log,
+                                 annotate=annotate if args.record_annotated else None)
 
-        # Mark the ArUco markers on the frame
-        frame = mark_ArUco_image(frame, ArUco_details_dict, ArUco_corners)
+    # Commands are issued by the fixed-rate control thread, not once per camera frame
+    controller.start()
 
-        # Display the frame
-        cv2.imshow("Aruco Marker Detection with Bounding Box", frame)
+    # Start listening for keyboard inputs in a separate thread
+    listener = keyboard.Listener(on_press=on_press, on_release=on_release)
+    listener.start()
 
-        # Exit on 'q' key press
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+    # The governor starts from the resolution the camera actually delivers
+    capture_size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    governor = ResolutionGovernor(budget_ms=FRAME_BUDGET_MS, resolution=capture_size) if args.adaptive_resolution else None
+    stride = 1  # Detection runs on every stride-th frame
+    frame_count = 0
+    frame_shape = None
+    base_calibration = calibration
+    detections = MarkerDetections.from_detection(None, None)
 
-    # Release video capture object and close windows
-    cap.release()
-    cv2.destroyAllWindows()
+    try:
+        while True:
+            # Wait for the newest frame, stale frames are dropped by the grabber
+            with timer.stage("capture"):
+                ret, frame = grabber.read()
+
+            if not ret:
+                print("Failed to grab frame")
+                break
+
+            # The frame budget covers the whole iteration from here on; the wait for the next
+            # frame above is idle time set by the camera rate
+            start = time.perf_counter()
+
+            # Get frame dimensions
+            frame_height, frame_width, _ = frame.shape
+
+            # Intrinsics calibrated at another resolution are rescaled to the capture size
+            if base_calibration is not None and frame.shape != frame_shape:
+                calibration = base_calibration.scaled((frame_width, frame_height))
+                controller.calibration = calibration
+            frame_shape = frame.shape
+
+            frame_count += 1
+            if session_log is not None:
+                session_log.log_frame(frame_count)
+
+            if frame_count % stride == 0:
+                # Detect ArUco markers
+                with timer.stage("detect"):
+                    detections = detect_ArUco_details(frame)
+                if session_log is not None:
+                    session_log.log_detections(frame_count, detections)
+
+                # Hand the latest detections to the control thread
+                with timer.stage("control"):
+                    controller.update(detections, frame_width)
+
+            # Hand the frame to the display thread, the control loop never waits on rendering
+            display.submit(frame, detections)
+            if recorder is not None:
+                recorder.submit(frame_count, frame, detections)
+            timer.tick()
+
+            # Let the governor pick the resolution and stride for the next frames
+            if governor is not None:
+                marker_fraction = float(detections.sizes[detections.row(72)]) / frame_width if 72 in detections else None
+                setting = governor.observe((time.perf_counter() - start) * 1000.0, marker_fraction)
+                if setting is not None:
+                    width, height, stride = setting
+                    grabber.request_resolution(width, height)
+                    logger.info("Capture %dx%d, detection every %d frame(s)", width, height, stride)
+
+            # Exit on 'q' key press
+            if display.quit_requested.is_set():
+                break
+    except KeyboardInterrupt:
+        pass  # Ctrl-C is the way out in headless mode
+    finally:
+        # Stop the robot and finalise the recording first, then stop the capture thread,
+        # close the window and release video capture object
+        controller.stop()
+        send_command("S")  # Leave the robot stopped
+        channel.close()
+        if recorder is not None:
+            recorder.close()
+            session_log.close()
+            print(f"Recorded {recorder.written_frames} frames ({recorder.dropped_frames} dropped) to {args.record}.avi")
+        grabber.stop()
+        display.stop()
+        print(f"Dropped {grabber.dropped_frames} stale frames")
+        cap.release()
+        log_listener.stop()
+        if args.timings:
+            timer.dump(args.timings)
@@ -0,0 +1,147 @@
+"""
+Author: Yash Pathak [Github: vindicta07]
+Email: yashpradeeppathak@gmail.com
+Description: Shared ArUco marker detector with tunable detection parameters
+"""
+
+import cv2
+from cv2 import aruco
+import numpy as np
+
+# Corner refinement methods that can be selected by name
+CORNER_REFINEMENT_METHODS = {
+    "none": aruco.CORNER_REFINE_NONE,
+    "subpix": aruco.CORNER_REFINE_SUBPIX,
+    "contour": aruco.CORNER_REFINE_CONTOUR,
+    "apriltag": aruco.CORNER_REFINE_APRILTAG,
+}
+
+# Create detector parameters on both the new and the legacy aruco API
+def create_detector_parameters():
+    if hasattr(aruco, "DetectorParameters_create"):
+        return aruco.DetectorParameters_create()
+    return aruco.DetectorParameters()
+
+# Stateful ArUco detector: the dictionary, parameters and detector are built once
+# and reused for every frame instead of being recreated per call
+class MarkerDetector:
+    def __init__(self, dictionary_id=aruco.DICT_4X4_250,
+                 adaptive_thresh_win_size_min=3, adaptive_thresh_win_size_max=23,
+                 adaptive_thresh_win_size_step=10, corner_refinement="none",
+                 min_marker_perimeter_rate=0.03, max_marker_perimeter_rate=4.0,
+                 downscale=1.0):
+        if not 0.0 < downscale <= 1.0:
+            raise ValueError(f"downscale must be in (0, 1], got {downscale}")
+        if corner_refinement not in CORNER_REFINEMENT_METHODS:
+            raise ValueError(f"Unknown corner refinement method: {corner_refinement}")
+
+        self.dictionary = aruco.getPredefinedDictionary(dictionary_id)
+
+        # Only the parameters that matter for detection speed are exposed here,
+        # everything else keeps the OpenCV defaults
+        self.parameters = create_detector_parameters()
+        self.parameters.adaptiveThreshWinSizeMin = adaptive_thresh_win_size_min
+        self.parameters.adaptiveThreshWinSizeMax = adaptive_thresh_win_size_max
+        self.parameters.adaptiveThreshWinSizeStep = adaptive_thresh_win_size_step
+        self.parameters.cornerRefinementMethod = CORNER_REFINEMENT_METHODS[corner_refinement]
+        self.parameters.minMarkerPerimeterRate = min_marker_perimeter_rate
+        self.parameters.maxMarkerPerimeterRate = max_marker_perimeter_rate
+
+        # Pyramid detection: candidates are searched on a frame resized by this factor
+        # (e.g. 0.5 or 0.25) and the corners refined back at full resolution
+        self.downscale = downscale
+        self._subpix_window = (max(3, int(round(2 / downscale))),) * 2
+        self._subpix_criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.01)
+
+        # Use the ArucoDetector class where available (OpenCV >= 4.7)
+        if hasattr(aruco, "ArucoDetector"):
+            self._detector = aruco.ArucoDetector(self.dictionary, self.parameters)
+        else:
+            self._detector = None
+
+    # Detect markers in a BGR or grayscale image, returns (corners, ids) in full-resolution
+    # image coordinates
+    def detect(self, image):
+        if self.downscale < 1.0:
+            return self._detect_pyramid(image)
+        return self._detect(image)
+
+    def _detect(self, image):
+        if self._detector is not None:
+            corners, ids, _ = self._detector.detectMarkers(image)
+        else:
+            corners, ids, _ = aruco.detectMarkers(image, self.dictionary, parameters=self.parameters)
+
+        # Newer OpenCV builds return a flat id array, keep the legacy (n, 1) shape
+        if ids is not None and len(ids) == 0:
+            ids = None
+        elif ids is not None:
+            ids = ids.reshape(-1, 1)
+        return corners, ids
+
+    # Find candidates on the downscaled grayscale frame, then map the corners back up and
+    # refine them with sub-pixel accuracy on the full-resolution frame
+    def _detect_pyramid(self, image):
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        small = cv2.resize(gray, None, fx=self.downscale, fy=self.downscale, interpolation=cv2.INTER_AREA)
+
+        corners, ids = self._detect(small)
+        if ids is None:
+            return corners, ids
+
+        # Pixel centers are preserved when scaling between the two resolutions
+        points = (np.concatenate(corners).reshape(-1, 1, 2) + 0.5) / self.downscale - 0.5
+        points = points.astype(np.float32)
+        cv2.cornerSubPix(gray, points, self._subpix_window, (-1, -1), self._subpix_criteria)
+
+        return tuple(points.reshape(-1, 1, 4, 2)), ids
+
+# Array-backed detection result. Geometry for all markers is computed in one vectorized
+# pass over the (n, 4, 2) corner array, with an O(1) marker id to row lookup
+class MarkerDetections:
+    def __init__(self, ids, corners):
+        self.ids = ids          # (n,) marker ids
+        self.corners = corners  # (n, 4, 2) corners, clockwise from top-left
+
+        # Center of each marker (mean of its four corners)
+        self.centers = corners.mean(axis=1)
+
+        # Angle of the top edge (top-left -> top-right) in degrees
+        top_edge = corners[:, 1] - corners[:, 0]
+        self.angles = np.degrees(np.arctan2(top_edge[:, 1], top_edge[:, 0]))
+
+        # Diagonal size (top-left -> bottom-right) in pixels
+        diagonal = corners[:, 0] - corners[:, 2]
+        self.sizes = np.hypot(diagonal[:, 0], diagonal[:, 1])
+
+        # Enclosed area in square pixels (shoelace formula)
+        x, y = corners[:, :, 0], corners[:, :, 1]
+        self.areas = 0.5 * np.abs(np.sum(x * np.roll(y, -1, axis=1) - y * np.roll(x, -1, axis=1), axis=1))
+
+        # Later duplicates of an id win, like the dicts this result replaces
+        self._rows = dict(zip(ids.tolist(), range(len(ids))))
+
+    # Build the result from the (corners, ids) pair returned by MarkerDetector.detect()
+    @classmethod
+    def from_detection(cls, corners, ids):
+        if ids is None:
+            return cls(np.empty(0, np.int32), np.empty((0, 4, 2), np.float32))
+        return cls(ids.reshape(-1).astype(np.int32), np.asarray(corners, np.float32).reshape(-1, 4, 2))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, marker_id):
+        return marker_id in self._rows
+
+    # Iterate over the detected marker ids, once per id
+    def __iter__(self):
+        return iter(self._rows)
+
+    # Row index of a marker id, raises KeyError if the marker was not detected
+    def row(self, marker_id):
+        return self._rows[marker_id]
+
+    # Subset of the detections selected by a boolean mask or index array
+    def select(self, mask):
+        return MarkerDetections(self.ids[mask], self.corners[mask])
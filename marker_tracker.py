@@ -0,0 +1,218 @@
+"""
+Author: Yash Pathak [Github: vindicta07]
+Email: yashpradeeppathak@gmail.com
+Description: ROI-predicted ArUco marker search and optical-flow corner tracking between detections
+"""
+
+import cv2
+import numpy as np
+
+# Last known state of a tracked marker
+class MarkerTrack:
+    def __init__(self, corners, frame_index):
+        self.corners = corners                 # (4, 2) corners in full-frame coordinates
+        self.velocity = np.zeros(2, np.float32)  # Center displacement per frame
+        self.last_seen = frame_index
+
+    # Corners extrapolated to the given frame from the last seen position
+    def predict(self, frame_index):
+        return self.corners + self.velocity * (frame_index - self.last_seen)
+
+    def update(self, corners, frame_index):
+        elapsed = frame_index - self.last_seen
+        if elapsed > 0:
+            self.velocity = (corners.mean(axis=0) - self.corners.mean(axis=0)) / elapsed
+        self.corners = corners
+        self.last_seen = frame_index
+
+# Wraps a MarkerDetector and searches only a padded crop around the predicted position
+# of each tracked marker. A marker missed in its crop triggers a full-frame scan of the same
+# frame, and every full_scan_interval frames is a full scan. detect() returns the same
+# (corners, ids) as the detector; between full scans only the tracked markers are reported
+class RoiMarkerTracker:
+    def __init__(self, detector, tracked_ids, padding=0.75, full_scan_interval=30):
+        self.detector = detector
+        self.tracked_ids = set(tracked_ids)
+        self.padding = padding                  # Crop padding as a fraction of the marker extent
+        self.full_scan_interval = full_scan_interval
+
+        self.tracks = {}
+        self.frame_index = 0
+        self._frame_shape = None
+
+    # Forget all tracks, the next frame gets a full-frame scan
+    def reset(self):
+        self.tracks.clear()
+        self.frame_index = 0
+        self._frame_shape = None
+        if hasattr(self.detector, "reset"):
+            self.detector.reset()
+
+    def detect(self, image):
+        self.frame_index += 1
+
+        # Tracks are in pixels of the previous resolution, drop them when it changes
+        if image.shape[:2] != self._frame_shape:
+            self.tracks.clear()
+            self._frame_shape = image.shape[:2]
+
+        if self.tracks and self.frame_index % self.full_scan_interval != 0:
+            found = [(marker_id, self._search_roi(image, marker_id, track)) for marker_id, track in self.tracks.items()]
+            if all(corners is not None for _, corners in found):
+                for marker_id, corners in found:
+                    self.tracks[marker_id].update(corners, self.frame_index)
+                return (tuple(corners.reshape(1, 4, 2) for _, corners in found),
+                        np.array([marker_id for marker_id, _ in found], np.int32).reshape(-1, 1))
+
+        # No tracks yet, a scheduled full scan, or a marker missed in its crop
+        corners, ids = self.detector.detect(image)
+        self._update_tracks(corners, ids)
+        return corners, ids
+
+    # Run detection on a padded crop around the predicted marker, returns full-frame corners
+    def _search_roi(self, image, marker_id, track):
+        frame_height, frame_width = image.shape[:2]
+        predicted = track.predict(self.frame_index)
+
+        (min_x, min_y), (max_x, max_y) = predicted.min(axis=0), predicted.max(axis=0)
+        pad = self.padding * max(max_x - min_x, max_y - min_y)
+        x0 = int(max(min_x - pad, 0))
+        y0 = int(max(min_y - pad, 0))
+        x1 = int(min(max_x + pad, frame_width))
+        y1 = int(min(max_y + pad, frame_height))
+        if x1 - x0 < 8 or y1 - y0 < 8:
+            return None
+
+        corners, ids = self.detector.detect(image[y0:y1, x0:x1])
+        if ids is None:
+            return None
+
+        for i in range(len(ids)):
+            if int(ids[i][0]) == marker_id:
+                return corners[i][0] + np.array([x0, y0], np.float32)
+        return None
+
+    # Start, refresh or age the tracks from a full-frame detection
+    def _update_tracks(self, corners, ids):
+        seen = set()
+        if ids is not None:
+            for i in range(len(ids)):
+                marker_id = int(ids[i][0])
+                if marker_id not in self.tracked_ids or marker_id in seen:
+                    continue
+                seen.add(marker_id)
+
+                if marker_id in self.tracks:
+                    self.tracks[marker_id].update(corners[i][0], self.frame_index)
+                else:
+                    self.tracks[marker_id] = MarkerTrack(corners[i][0], self.frame_index)
+
+        for marker_id in list(self.tracks):
+            if marker_id not in seen:
+                del self.tracks[marker_id]
+
+# Shape checks of a tracked marker quadrilateral (4, 2): convex, sides of similar length
+# and diagonals of similar length. Returns True when it still looks like a marker
+def is_marker_quad(corners, min_side_ratio=0.5, min_diagonal_ratio=0.6):
+    edges = np.roll(corners, -1, axis=0) - corners
+    cross = edges[:, 0] * np.roll(edges, -1, axis=0)[:, 1] - edges[:, 1] * np.roll(edges, -1, axis=0)[:, 0]
+    if not (np.all(cross > 0) or np.all(cross < 0)):
+        return False
+
+    sides = np.linalg.norm(edges, axis=1)
+    diagonals = np.linalg.norm(corners[2:] - corners[:2], axis=1)
+    if sides.max() <= 0 or diagonals.max() <= 0:
+        return False
+    return sides.min() / sides.max() >= min_side_ratio and diagonals.min() / diagonals.max() >= min_diagonal_ratio
+
+# Wraps a detector (MarkerDetector or RoiMarkerTracker) and runs it only every
+# detect_interval frames. In between, the last known corners of the tracked markers are
+# followed with pyramidal Lucas-Kanade optical flow. A track whose corners are lost, whose
+# flow error is too high or whose quadrilateral stops looking like a marker forces a
+# detection on the current frame. detect() returns the same (corners, ids) as the detector
+class FlowMarkerTracker:
+    def __init__(self, detector, tracked_ids=None, detect_interval=5, max_flow_error=12.0,
+                 max_area_change=0.3, win_size=(21, 21), max_level=3):
+        self.detector = detector
+        self.tracked_ids = None if tracked_ids is None else set(tracked_ids)  # None tracks every marker
+        self.detect_interval = detect_interval
+        self.max_flow_error = max_flow_error    # Mean LK error per corner above which a track is dropped
+        self.max_area_change = max_area_change  # Largest relative area change between two frames
+        self.lk_params = dict(winSize=win_size, maxLevel=max_level,
+                              criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03))
+
+        self.frame_index = 0
+        self.detections = 0  # Frames that ran the full detector
+        self.tracked = 0     # Frames answered by optical flow only
+
+        self._prev_gray = None
+        self._ids = None
+        self._corners = None  # (n, 4, 2) float32 corners of the tracked markers
+        self._last_detection = 0
+
+    # Forget the tracked markers, the next frame runs the detector
+    def reset(self):
+        self._prev_gray = None
+        self._ids = None
+        self._corners = None
+        if hasattr(self.detector, "reset"):
+            self.detector.reset()
+
+    def detect(self, image):
+        self.frame_index += 1
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+
+        result = None
+        if (self._ids is not None and self._prev_gray is not None and self._prev_gray.shape == gray.shape
+                and self.frame_index - self._last_detection < self.detect_interval):
+            result = self._track(gray)
+        if result is None:
+            result = self._detect(image)
+
+        self._prev_gray = gray
+        return result
+
+    # Full detection, restarts the tracks from its result
+    def _detect(self, image):
+        corners, ids = self.detector.detect(image)
+        self.detections += 1
+        self._last_detection = self.frame_index
+        self._ids = None
+        self._corners = None
+
+        if ids is not None:
+            keep = [i for i in range(len(ids))
+                    if self.tracked_ids is None or int(ids[i][0]) in self.tracked_ids]
+            if keep:
+                self._ids = ids[keep].reshape(-1, 1)
+                self._corners = np.array([corners[i] for i in keep], np.float32).reshape(-1, 4, 2)
+        return corners, ids
+
+    # Follow the corners with optical flow, returns None when any track degraded
+    def _track(self, gray):
+        previous = self._corners.reshape(-1, 1, 2)
+        points, status, error = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, previous, None, **self.lk_params)
+        if points is None:
+            return None
+
+        points = points.reshape(-1, 4, 2)
+        status = status.reshape(-1, 4).all(axis=1)
+        error = error.reshape(-1, 4).mean(axis=1)
+
+        previous_area = np.abs(self._quad_areas(self._corners))
+        area_change = np.abs(np.abs(self._quad_areas(points)) / np.maximum(previous_area, 1e-6) - 1.0)
+
+        for i in range(len(points)):
+            if (not status[i] or error[i] > self.max_flow_error or area_change[i] > self.max_area_change
+                    or not is_marker_quad(points[i])):
+                return None
+
+        self.tracked += 1
+        self._corners = points
+        return tuple(points[i].reshape(1, 4, 2) for i in range(len(points))), self._ids.copy()
+
+    # Signed shoelace area of each (4, 2) quadrilateral
+    @staticmethod
+    def _quad_areas(corners):
+        x, y = corners[..., 0], corners[..., 1]
+        return 0.5 * (x * np.roll(y, -1, axis=-1) - np.roll(x, -1, axis=-1) * y).sum(axis=-1)
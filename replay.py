@@ -0,0 +1,134 @@
+"""
+Author: Yash Pathak [Github: vindicta07]
+Email: yashpradeeppathak@gmail.com
+Description: Headless faster-than-realtime replay of the vision pipeline over video files and image folders
+"""
+
+import os
+import time
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+# Camera index or video file path
+def parse_source(source):
+    return int(source) if source.isdigit() else source
+
+# Yield frames from a video file or from the images of a directory (in file name order)
+def iter_frames(source):
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                frame = cv2.imread(os.path.join(source, name))
+                if frame is not None:
+                    yield frame
+        return
+
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video source: {source}")
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame
+    finally:
+        cap.release()
+
+# Frame rate of a video file, or `default` for image folders and files without one
+def source_fps(source, default=30.0):
+    if os.path.isdir(source):
+        return default
+    cap = cv2.VideoCapture(source)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    cap.release()
+    return fps if fps > 0 else default
+
+# Drop-in replacement for CommandChannel that records commands instead of sending them
+class CommandRecorder:
+    def __init__(self):
+        self.frame_index = 0
+        self.frames = []
+        self.commands = []
+        self.speeds = []
+
+    def send(self, command, speed=None):
+        self.frames.append(self.frame_index)
+        self.commands.append(command)
+        self.speeds.append(-1 if speed is None else speed)
+        return True
+
+    def close(self):
+        pass
+
+# Run detect(frame) -> MarkerDetections and the optional control(detections, frame) decision
+# over every frame as fast as the CPU allows. Commands sent through `recorder` and the
+# per-frame detections are written to a columnar npz log. Returns a summary dict
+def run_replay(source, detect, control=None, recorder=None, log_path=None):
+    det_frame, det_id, det_corners = [], [], []
+    det_center, det_angle, det_size = [], [], []
+    frame_times = []
+
+    start = time.perf_counter()
+    for frame_index, frame in enumerate(iter_frames(source)):
+        frame_start = time.perf_counter()
+        if recorder is not None:
+            recorder.frame_index = frame_index
+
+        detections = detect(frame)
+        if control is not None:
+            control(detections, frame)
+
+        frame_times.append(time.perf_counter() - frame_start)
+
+        if len(detections):
+            det_frame.append(np.full(len(detections), frame_index, np.int32))
+            det_id.append(detections.ids)
+            det_corners.append(detections.corners)
+            det_center.append(detections.centers)
+            det_angle.append(detections.angles)
+            det_size.append(detections.sizes)
+    elapsed = time.perf_counter() - start
+
+    frame_count = len(frame_times)
+    frame_times = np.array(frame_times, np.float32) * 1000.0
+
+    # One flat array per column, rows of different frames are told apart by det_frame
+    def column(chunks, dtype, shape=()):
+        if chunks:
+            return np.concatenate(chunks).astype(dtype)
+        return np.empty((0,) + shape, dtype)
+
+    log = {
+        "frame_time_ms": frame_times,
+        "det_frame": column(det_frame, np.int32),
+        "det_id": column(det_id, np.int32),
+        "det_corners": column(det_corners, np.float32, (4, 2)),
+        "det_center": column(det_center, np.float32, (2,)),
+        "det_angle": column(det_angle, np.float32),
+        "det_size": column(det_size, np.float32),
+    }
+    if recorder is not None:
+        log["cmd_frame"] = np.array(recorder.frames, np.int32)
+        log["cmd"] = np.array(recorder.commands, dtype="U8")
+        log["cmd_speed"] = np.array(recorder.speeds, np.int16)
+
+    if log_path is not None:
+        np.savez_compressed(log_path, **log)
+
+    return {
+        "frames": frame_count,
+        "detections": len(log["det_id"]),
+        "commands": len(recorder.commands) if recorder is not None else 0,
+        "elapsed": elapsed,
+        "fps": frame_count / elapsed if elapsed > 0 else 0.0,
+        "mean_frame_ms": float(frame_times.mean()) if frame_count else 0.0,
+    }
+
+def print_summary(summary):
+    print(f"Replayed {summary['frames']} frames in {summary['elapsed']:.2f} s "
+          f"({summary['fps']:.1f} fps, {summary['mean_frame_ms']:.2f} ms/frame), "
+          f"{summary['detections']} detections, {summary['commands']} commands")
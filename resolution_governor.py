@@ -0,0 +1,125 @@
+"""
+Author: Yash Pathak [Github: vindicta07]
+Email: yashpradeeppathak@gmail.com
+Description: Adaptive capture resolution and detection stride governor for a per-frame time budget
+"""
+
+# Quality levels from the most to the least expensive: (width, height, detection stride).
+# A stride of 2 runs detection on every second frame
+DEFAULT_LEVELS = [
+    (1280, 720, 1),
+    (960, 540, 1),
+    (640, 480, 1),
+    (640, 480, 2),
+    (640, 360, 2),
+    (640, 360, 3),
+]
+
+# Steps the capture resolution and detection stride to keep the per-frame processing time
+# within a budget. The smoothed frame time has to stay above the budget for
+# degrade_frames frames before stepping to a cheaper level. Stepping back needs the time
+# predicted for the better level (scaled by pixels per detected frame) to stay below
+# upgrade_ratio * budget for upgrade_frames frames, and every change is followed by a
+# cooldown so the measurement settles at the new level. Independently, a marker
+# that is large in frame (close) allows the resolution to drop to large_marker_level.
+# Pass the camera's actual (width, height) as resolution so the governor starts from the
+# nearest level at or below it instead of switching the camera to the first level
+class ResolutionGovernor:
+    def __init__(self, budget_ms=20.0, levels=None, degrade_frames=10, upgrade_frames=60,
+                 upgrade_ratio=0.8, cooldown_frames=30, smoothing=0.1,
+                 large_marker_level=4, large_marker_enter=0.25, large_marker_exit=0.18,
+                 resolution=None):
+        self.budget_ms = budget_ms
+        self.levels = list(levels or DEFAULT_LEVELS)
+        self.degrade_frames = degrade_frames
+        self.upgrade_frames = upgrade_frames
+        self.upgrade_ratio = upgrade_ratio
+        self.cooldown_frames = cooldown_frames
+        self.smoothing = smoothing                      # EWMA weight of the newest frame time
+        self.large_marker_level = min(large_marker_level, len(self.levels) - 1)
+        self.large_marker_enter = large_marker_enter    # Marker size / frame width to enter the close range
+        self.large_marker_exit = large_marker_exit      # ... and to leave it again
+
+        self.budget_level = 0      # Level chosen from the frame times alone
+        self.marker_close = False
+        self.smoothed_ms = None
+        self.changes = 0
+
+        self._over = 0
+        self._under = 0
+        self._cooldown = 0
+        self._applied = None
+
+        if resolution is not None:
+            width, height = resolution
+            self.budget_level = next((i for i, (w, h, _) in enumerate(self.levels) if w * h <= width * height),
+                                     len(self.levels) - 1)
+            self._applied = (width, height, 1)  # What the camera runs before the first change
+
+    # Level in effect: the budget level, or cheaper while the marker is close
+    @property
+    def level(self):
+        return max(self.budget_level, self.large_marker_level) if self.marker_close else self.budget_level
+
+    # Current (width, height, stride)
+    @property
+    def setting(self):
+        return self.levels[self.level]
+
+    # Record the processing time of one frame and, optionally, the size of the target marker
+    # as a fraction of the frame width. Returns the new (width, height, stride) when the
+    # setting changed, otherwise None
+    def observe(self, frame_ms, marker_fraction=None):
+        if self.smoothed_ms is None:
+            self.smoothed_ms = frame_ms
+        else:
+            self.smoothed_ms += self.smoothing * (frame_ms - self.smoothed_ms)
+
+        if marker_fraction is not None:
+            if self.marker_close and marker_fraction < self.large_marker_exit:
+                self.marker_close = False
+            elif not self.marker_close and marker_fraction > self.large_marker_enter:
+                self.marker_close = True
+
+        if self._cooldown > 0:
+            self._cooldown -= 1
+        else:
+            self._step_budget_level()
+
+        setting = self.setting
+        if setting == self._applied:
+            return None
+        if self._applied is not None:
+            self.changes += 1
+            self._cooldown = self.cooldown_frames
+            self._over = self._under = 0
+        self._applied = setting
+        return setting
+
+    # Relative processing cost of a level: pixels per frame divided by the detection stride
+    def relative_cost(self, level):
+        width, height, stride = self.levels[level]
+        return width * height / stride
+
+    def _step_budget_level(self):
+        # Headroom only counts when measured at the budget level, not at the close-marker level
+        can_upgrade = self.budget_level > 0 and self.level == self.budget_level
+        if can_upgrade:
+            scale = self.relative_cost(self.budget_level - 1) / self.relative_cost(self.budget_level)
+            can_upgrade = self.smoothed_ms * scale < self.upgrade_ratio * self.budget_ms
+
+        if self.smoothed_ms > self.budget_ms:
+            self._over += 1
+            self._under = 0
+        elif can_upgrade:
+            self._under += 1
+            self._over = 0
+        else:
+            self._over = self._under = 0
+
+        if self._over >= self.degrade_frames and self.budget_level < len(self.levels) - 1:
+            self.budget_level += 1
+            self._over = 0
+        elif self._under >= self.upgrade_frames:
+            self.budget_level -= 1
+            self._under = 0
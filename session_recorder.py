@@ -0,0 +1,245 @@
+"""
+Author: Yash Pathak [Github: vindicta07]
+Email: yashpradeeppathak@gmail.com
+Description: Non-blocking session recording of video, detections and sent commands, with a frame-accurate reader
+"""
+
+import argparse
+import queue
+import struct
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from marker_detector import MarkerDetections
+
+# Append-only session log: an 8-byte header, then records of
+#   type (u8), monotonic timestamp in ns (i64), payload size (u32), payload
+LOG_HEADER = b"AGVLOG\x01\n"
+RECORD = struct.Struct("<BqI")
+
+RECORD_FRAME = 1       # payload: frame index (u32), a frame entered the vision loop
+RECORD_DETECTIONS = 2  # payload: frame index (u32), count n (u32), ids (i32 x n), corners (f32 x 8n)
+RECORD_COMMAND = 3     # payload: speed (i16, -1 for none), command (utf-8), a packet went on the wire
+RECORD_VIDEO = 4       # payload: frame index (u32), the frame was written to the video file
+
+FRAME_PAYLOAD = struct.Struct("<I")
+DETECTIONS_PAYLOAD = struct.Struct("<II")
+COMMAND_PAYLOAD = struct.Struct("<h")
+
+# Binary session log. Records are packed into an in-memory buffer under a lock, which costs
+# a few microseconds on the caller's thread; a background thread appends the buffer to the
+# file and flushes it every flush_interval seconds, so file I/O never touches the control loop
+class SessionLog:
+    def __init__(self, path, flush_interval=1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.record_count = 0
+
+        self._file = open(path, "wb")
+        self._file.write(LOG_HEADER)
+        self._lock = threading.Lock()
+        self._buffer = bytearray()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._thread.start()
+
+    def log_frame(self, frame_index, timestamp_ns=None):
+        self._append(RECORD_FRAME, FRAME_PAYLOAD.pack(frame_index), timestamp_ns)
+
+    def log_detections(self, frame_index, detections, timestamp_ns=None):
+        payload = (DETECTIONS_PAYLOAD.pack(frame_index, len(detections))
+                   + detections.ids.astype("<i4").tobytes()
+                   + detections.corners.astype("<f4").tobytes())
+        self._append(RECORD_DETECTIONS, payload, timestamp_ns)
+
+    def log_command(self, command, speed=None, timestamp_ns=None):
+        payload = COMMAND_PAYLOAD.pack(-1 if speed is None else speed) + command.encode()
+        self._append(RECORD_COMMAND, payload, timestamp_ns)
+
+    def log_video_frame(self, frame_index, timestamp_ns=None):
+        self._append(RECORD_VIDEO, FRAME_PAYLOAD.pack(frame_index), timestamp_ns)
+
+    def _append(self, record_type, payload, timestamp_ns):
+        if timestamp_ns is None:
+            timestamp_ns = time.monotonic_ns()
+        with self._lock:
+            self._buffer += RECORD.pack(record_type, timestamp_ns, len(payload))
+            self._buffer += payload
+            self.record_count += 1
+
+    def flush(self):
+        with self._lock:
+            data, self._buffer = self._buffer, bytearray()
+        if data:
+            self._file.write(data)
+            self._file.flush()
+
+    def _flush_loop(self):
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        self._stop_event.set()
+        self._thread.join(timeout=1.0)
+        self.flush()
+        self._file.close()
+
+# Writes frames to a cv2.VideoWriter on its own thread. submit() never blocks: when the
+# bounded queue is full the frame is dropped. With an annotate(image, detections) callable
+# the drawing also happens on the writer thread. Frames actually written are logged to the
+# optional SessionLog, which is what makes the video frame-accurate against the log
+class VideoRecorder:
+    def __init__(self, path, fps=30.0, fourcc="MJPG", queue_size=32, annotate=None, session_log=None):
+        self.path = path
+        self.fps = fps
+        self.fourcc = cv2.VideoWriter_fourcc(*fourcc)
+        self.annotate = annotate
+        self.session_log = session_log
+
+        self.written_frames = 0
+        self.dropped_frames = 0
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._writer = None
+        self._frame_size = None
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    # Queue a frame for writing. The frame must not be modified afterwards (the vision loops
+    # hand over each captured frame once and only draw on copies)
+    def submit(self, frame_index, frame, detections=None):
+        try:
+            self._queue.put_nowait((frame_index, frame, detections))
+        except queue.Full:
+            self.dropped_frames += 1
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            frame_index, frame, detections = item
+
+            if self.annotate is not None:
+                frame = self.annotate(frame.copy(), detections)
+            if self._writer is None:
+                height, width = frame.shape[:2]
+                self._writer = cv2.VideoWriter(self.path, self.fourcc, self.fps, (width, height))
+                self._frame_size = (width, height)
+            if (frame.shape[1], frame.shape[0]) != self._frame_size:
+                frame = cv2.resize(frame, self._frame_size)  # The capture resolution changed
+
+            self._writer.write(frame)
+            self.written_frames += 1
+            if self.session_log is not None:
+                self.session_log.log_video_frame(frame_index)
+
+    # Write the frames still queued and close the file
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        if self._writer is not None:
+            self._writer.release()
+
+# Yield (type, timestamp_ns, payload) for every complete record of a session log. A record
+# cut off by a crash ends the iteration
+def iter_log_records(path):
+    with open(path, "rb") as f:
+        if f.read(len(LOG_HEADER)) != LOG_HEADER:
+            raise ValueError(f"{path} is not a session log")
+        while True:
+            header = f.read(RECORD.size)
+            if len(header) < RECORD.size:
+                return
+            record_type, timestamp_ns, size = RECORD.unpack(header)
+            payload = f.read(size)
+            if len(payload) < size:
+                return
+            yield record_type, timestamp_ns, payload
+
+# One frame of a recorded session
+class SessionFrame:
+    def __init__(self, frame_index, timestamp_ns):
+        self.frame_index = frame_index
+        self.timestamp_ns = timestamp_ns
+        self.detections = None  # MarkerDetections, None when detection did not run on this frame
+        self.commands = []      # (timestamp_ns, command, speed) sent after this frame, before the next
+        self.video_position = None  # Index of the frame in the video file, None when it was dropped
+
+# Parse a session log into a list of SessionFrame ordered by frame index. Commands sent
+# before the first frame are returned separately
+def load_session(path):
+    frames = {}
+    current = None
+    initial_commands = []
+    video_position = 0
+
+    for record_type, timestamp_ns, payload in iter_log_records(path):
+        if record_type == RECORD_FRAME:
+            (frame_index,) = FRAME_PAYLOAD.unpack(payload)
+            current = frames[frame_index] = SessionFrame(frame_index, timestamp_ns)
+        elif record_type == RECORD_DETECTIONS:
+            frame_index, count = DETECTIONS_PAYLOAD.unpack_from(payload)
+            offset = DETECTIONS_PAYLOAD.size
+            ids = np.frombuffer(payload, "<i4", count, offset).astype(np.int32)
+            corners = np.frombuffer(payload, "<f4", count * 8, offset + 4 * count).reshape(count, 4, 2)
+            if frame_index in frames:
+                frames[frame_index].detections = MarkerDetections(ids, corners.astype(np.float32))
+        elif record_type == RECORD_COMMAND:
+            (speed,) = COMMAND_PAYLOAD.unpack_from(payload)
+            command = (timestamp_ns, payload[COMMAND_PAYLOAD.size:].decode(), None if speed < 0 else speed)
+            (current.commands if current is not None else initial_commands).append(command)
+        elif record_type == RECORD_VIDEO:
+            (frame_index,) = FRAME_PAYLOAD.unpack(payload)
+            if frame_index in frames:
+                frames[frame_index].video_position = video_position
+            video_position += 1
+
+    return [frames[i] for i in sorted(frames)], initial_commands
+
+# Yield (SessionFrame, image) for every frame that made it into the video file, pairing
+# each video frame with the detections and commands logged for that exact frame
+def iter_session(video_path, log_path):
+    frames, _ = load_session(log_path)
+    recorded = [frame for frame in frames if frame.video_position is not None]
+    recorded.sort(key=lambda frame: frame.video_position)
+
+    cap = cv2.VideoCapture(video_path)
+    try:
+        for frame in recorded:
+            ret, image = cap.read()
+            if not ret:
+                return
+            yield frame, image
+    finally:
+        cap.release()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarise or play back a recorded session")
+    parser.add_argument("log", help="session log (.agvlog)")
+    parser.add_argument("--video", help="recorded video, played back with the logged detections drawn on")
+    args = parser.parse_args()
+
+    frames, initial_commands = load_session(args.log)
+    commands = initial_commands + [command for frame in frames for command in frame.commands]
+    detected = sum(frame.detections is not None for frame in frames)
+    recorded = sum(frame.video_position is not None for frame in frames)
+    duration = (frames[-1].timestamp_ns - frames[0].timestamp_ns) / 1e9 if len(frames) > 1 else 0.0
+    print(f"{len(frames)} frames over {duration:.1f} s, {detected} with detections, "
+          f"{recorded} in the video, {len(commands)} commands")
+
+    if args.video:
+        from integrate_v2 import mark_ArUco_image
+
+        for frame, image in iter_session(args.video, args.log):
+            if frame.detections is not None:
+                image = mark_ArUco_image(image, frame.detections)
+            for _, command, speed in frame.commands:
+                print(f"frame {frame.frame_index}: {command}" + ("" if speed is None else f",{speed}"))
+            cv2.imshow("Session playback", image)
+            if cv2.waitKey(30) & 0xFF == ord('q'):
+                break
+        cv2.destroyAllWindows()
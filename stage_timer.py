@@ -0,0 +1,138 @@
+"""
+Author: Yash Pathak [Github: vindicta07]
+Email: yashpradeeppathak@gmail.com
+Description: Per-stage latency instrumentation for the vision-to-command loop
+"""
+
+import csv
+import json
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# Timing of one stage, reused for every measurement on the same thread so the hot loop
+# allocates nothing
+class _StageContext:
+    __slots__ = ("timer", "name", "start")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.record(self.name, time.perf_counter() - self.start)
+        return False
+
+# Rolling per-stage latency histograms. Each stage keeps its last `window` samples in a
+# fixed ring buffer; percentiles are only computed when a summary is requested. Stages may
+# be timed from several threads (e.g. "send" from the control and keyboard threads): each
+# thread gets its own stage contexts and the ring buffers are guarded by a lock. The
+# overlay text is recomputed at most every overlay_interval seconds, not on every frame
+class StageTimer:
+    def __init__(self, window=1000, enabled=True, overlay_interval=0.25):
+        self.window = window
+        self.enabled = enabled
+        self.overlay_interval = overlay_interval
+
+        self._samples = {}   # Stage name -> ring buffer of durations (seconds)
+        self._counts = {}    # Stage name -> total number of samples recorded
+        self._local = threading.local()  # Per-thread stage name -> _StageContext
+        self._lock = threading.Lock()
+        self._last_tick = None
+        self._overlay = (float("-inf"), [])  # (time computed, lines), replaced as a whole
+
+    # Context manager timing one stage: `with timer.stage("detect"): ...`
+    def stage(self, name):
+        contexts = getattr(self._local, "contexts", None)
+        if contexts is None:
+            contexts = self._local.contexts = {}
+        context = contexts.get(name)
+        if context is None:
+            context = contexts[name] = _StageContext(self, name)
+        return context
+
+    def record(self, name, duration):
+        if not self.enabled:
+            return
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = np.zeros(self.window)
+                self._counts[name] = 0
+            samples[self._counts[name] % self.window] = duration
+            self._counts[name] += 1
+
+    # Mark the end of a frame, the interval between ticks is recorded as the "frame" stage
+    def tick(self):
+        now = time.perf_counter()
+        if self._last_tick is not None:
+            self.record("frame", now - self._last_tick)
+        self._last_tick = now
+
+    # Recent samples of a stage in milliseconds
+    def samples_ms(self, name):
+        with self._lock:
+            count = self._counts.get(name, 0)
+            return self._samples[name][:min(count, self.window)] * 1000.0 if count else np.empty(0)
+
+    # Per-stage count, mean and p50/p95/p99 in milliseconds over the rolling window
+    def summary(self):
+        # Snapshot the stages, other threads may add new ones while we compute
+        with self._lock:
+            stages = [(name, self._counts[name], self._samples[name][:min(self._counts[name], self.window)] * 1000.0)
+                      for name in self._samples]
+
+        result = {}
+        for name, count, samples in stages:
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+            result[name] = {
+                "count": count,
+                "mean_ms": float(samples.mean()),
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "p99_ms": float(p99),
+            }
+        return result
+
+    # Frames per second over the rolling window
+    def fps(self):
+        frame_ms = self.samples_ms("frame")
+        return 1000.0 / frame_ms.mean() if len(frame_ms) else 0.0
+
+    # Draw FPS and per-stage p50/p95 onto the image
+    def draw_overlay(self, image, origin=(10, 20)):
+        now = time.monotonic()
+        computed_at, lines = self._overlay
+        if now - computed_at >= self.overlay_interval:
+            lines = [f"FPS {self.fps():.1f}"]
+            for name, stats in self.summary().items():
+                if name != "frame":
+                    lines.append(f"{name} p50 {stats['p50_ms']:.1f} p95 {stats['p95_ms']:.1f} ms")
+            self._overlay = (now, lines)
+
+        x, y = origin
+        for line in lines:
+            cv2.putText(image, line, (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
+            y += 18
+        return image
+
+    # Write the summary to a .json or .csv file
+    def dump(self, path):
+        summary = self.summary()
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["stage", "count", "mean_ms", "p50_ms", "p95_ms", "p99_ms"])
+                for name, stats in summary.items():
+                    writer.writerow([name, stats["count"], f"{stats['mean_ms']:.3f}", f"{stats['p50_ms']:.3f}",
+                                     f"{stats['p95_ms']:.3f}", f"{stats['p99_ms']:.3f}"])
+        else:
+            with open(path, "w") as f:
+                json.dump(summary, f, indent=2)
@@ -0,0 +1,61 @@
+import types
+
+import numpy as np
+from cv2 import aruco
+
+import bench_aruco
+from marker_detector import MarkerDetections
+
+DICTIONARY = aruco.getPredefinedDictionary(aruco.DICT_4X4_250)
+
+def result(**overrides):
+    r = {"detect_fps": 100.0, "recall": 1.0, "false_positives": 0, "center_error_px": 0.2, "angle_error_deg": 0.3}
+    r.update(overrides)
+    return r
+
+def test_check_passes_within_tolerances():
+    baseline = {"480p/clean": result()}
+    assert bench_aruco.check_against_baseline({"480p/clean": result(detect_fps=80.0)}, baseline) == []
+
+def test_check_reports_regressions():
+    baseline = {"480p/clean": result()}
+    failures = bench_aruco.check_against_baseline(
+        {"480p/clean": result(detect_fps=50.0, recall=0.9, false_positives=1, center_error_px=1.0)}, baseline)
+    assert len(failures) == 4
+
+def test_check_reports_missing_cases():
+    baseline = {"480p/clean": result(), "480p/moving+tracking": result()}
+    failures = bench_aruco.check_against_baseline({"480p/clean": result()}, baseline)
+    assert failures == ["480p/moving+tracking: missing from the results"]
+
+def test_rendered_ground_truth_scores_perfectly():
+    rng = np.random.default_rng(0)
+    _, ids, corners = bench_aruco.render_scene(DICTIONARY, (640, 480), rng, **bench_aruco.SCENARIOS["many"])
+    matched, false_positives, center_errors, angle_errors = bench_aruco.score_detections(
+        MarkerDetections(ids, corners), ids, corners)
+    assert matched == len(ids)
+    assert false_positives == 0
+    assert max(center_errors) < 1e-4
+    assert max(angle_errors) < 1e-3
+
+def test_sequence_moves_the_tracked_marker_smoothly():
+    rng = np.random.default_rng(0)
+    scenes = bench_aruco.render_sequence(DICTIONARY, (640, 480), rng, 10, **bench_aruco.SEQUENCES["moving"])
+    centers = np.array([corners.mean(axis=1)[0] for _, _, corners in scenes])
+    assert all(ids.tolist() == [bench_aruco.TRACKED_ID] for _, ids, _ in scenes)
+    steps = np.linalg.norm(np.diff(centers, axis=0), axis=1)
+    assert np.all(steps <= bench_aruco.SEQUENCES["moving"]["speed"] + 1e-3)
+
+def test_independent_scenes_reset_the_trackers():
+    resets = []
+    detector = types.SimpleNamespace(reset=lambda: resets.append(1))
+    module = types.SimpleNamespace(detector=detector,
+                                   detect_ArUco_details=lambda image: MarkerDetections.from_detection(None, None),
+                                   mark_ArUco_image=lambda image, detections: image)
+    scenes = [(np.zeros((4, 4, 3), np.uint8), np.empty(0, np.int32), np.empty((0, 4, 2)))] * 3
+
+    bench_aruco.run_pass(module, scenes, independent=True)
+    assert len(resets) == 1 + 3
+    resets.clear()
+    bench_aruco.run_pass(module, scenes, independent=False)
+    assert len(resets) == 1
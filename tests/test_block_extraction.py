@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from block_extraction import BlockIndex, count_blocks_to_remove
+
+# The original per-cell implementation, used as the reference
+def brute_force(matrix, N, M, K):
+    blocks_to_remove = set()
+    positions_of_k = [(i, j) for i in range(N) for j in range(M) if matrix[i][j] == K]
+
+    for i, j in positions_of_k:
+        for row in range(i):
+            blocks_to_remove.add(matrix[row][j])
+    blocks_to_remove.discard(K)
+
+    for i, j in positions_of_k:
+        for col in range(M):
+            if col != j:
+                for row in range(i):
+                    if matrix[row][col] != K and matrix[row][col] != 0:
+                        blocks_to_remove.add(matrix[row][col])
+    return len(blocks_to_remove)
+
+def random_grid(rng, N, M, blocks, empty_fraction):
+    grid = rng.integers(1, blocks + 1, size=(N, M))
+    grid[rng.random((N, M)) < empty_fraction] = 0
+    return grid
+
+@pytest.mark.parametrize("seed", range(30))
+def test_count_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    N, M = rng.integers(1, 9, size=2)
+    grid = random_grid(rng, N, M, blocks=int(rng.integers(1, 8)), empty_fraction=rng.uniform(0, 0.5))
+    matrix = grid.tolist()
+    for K in range(0, 9):
+        assert count_blocks_to_remove(grid, N, M, K) == brute_force(matrix, N, M, K)
+
+def test_missing_block_needs_no_removal():
+    assert count_blocks_to_remove([[1, 2], [3, 4]], 2, 2, 9) == 0
+
+def test_empty_cell_above_k_counts_once():
+    grid = [[0, 0],
+            [1, 2]]
+    assert count_blocks_to_remove(grid, 2, 2, 1) == 1
+    assert brute_force(grid, 2, 2, 1) == 1
+
+@pytest.mark.parametrize("seed", range(20))
+def test_block_index_matches_brute_force_between_removals(seed):
+    rng = np.random.default_rng(seed)
+    N, M = rng.integers(2, 9, size=2)
+    grid = random_grid(rng, N, M, blocks=6, empty_fraction=0.2)
+    index = BlockIndex(grid, N, M)
+
+    for block_id in rng.permutation(np.arange(1, 7)).tolist():
+        for K in range(0, 8):
+            assert index.count_blocks_to_remove(K) == brute_force(grid.tolist(), N, M, K)
+        if block_id in index:
+            index.remove(block_id)
+            grid[grid == block_id] = 0
+
+def test_removal_order_puts_blocks_resting_on_others_first():
+    grid = [[1, 1, 2],
+            [3, 3, 2],
+            [3, 4, 4]]
+    order = BlockIndex(grid, 3, 3).removal_order()
+    assert order.index(1) < order.index(3)
+    assert order.index(2) < order.index(4)
+
+def test_removing_empty_or_missing_block_fails():
+    index = BlockIndex([[0, 1]], 1, 2)
+    with pytest.raises(KeyError):
+        index.remove(0)
+    with pytest.raises(KeyError):
+        index.remove(5)
@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from command_channel import CommandChannel, encode_binary, encode_text
+
+# Socket stand-in recording every packet
+class FakeSocket:
+    def __init__(self):
+        self.packets = []
+
+    def sendto(self, data, address):
+        self.packets.append(data)
+        return len(data)
+
+    def close(self):
+        pass
+
+# Non-blocking socket whose buffer is always full
+class FullSocket(FakeSocket):
+    def sendto(self, data, address):
+        raise BlockingIOError
+
+@pytest.fixture
+def channel():
+    channel = CommandChannel("127.0.0.1", 12345, keepalive_interval=0.05, keepalive_hold=0.2, sock=FakeSocket())
+    yield channel
+    channel.close()
+
+def test_text_and_binary_encoding():
+    assert encode_text("F") == b"F"
+    assert encode_text("F", 40) == b"F,40"
+    assert encode_binary("L", 20, sequence=3) == bytes([0xA5, 3, ord("L"), 20])
+
+def test_identical_commands_are_coalesced(channel):
+    assert channel.send("F", 40)
+    assert not channel.send("F", 40)
+    assert channel.sock.packets == [b"F,40"]
+    assert channel.coalesced_count == 1
+
+def test_changed_commands_are_sent_at_once(channel):
+    channel.send("F", 40)
+    channel.send("F", 44)
+    channel.send("L", 44)
+    assert channel.sock.packets == [b"F,40", b"F,44", b"L,44"]
+
+def test_repeated_command_is_refreshed_after_interval(channel):
+    channel.send("F", 40)
+    time.sleep(0.06)
+    assert channel.send("F", 40)
+
+def test_keepalive_repeats_only_stop(channel):
+    channel.send("F", 40)
+    time.sleep(0.15)
+    assert channel.sock.packets == [b"F,40"]
+
+    channel.send("S")
+    time.sleep(0.15)
+    assert len(channel.sock.packets) > 2
+    assert set(channel.sock.packets[1:]) == {b"S"}
+
+    # Repeats end keepalive_hold after the last request
+    time.sleep(0.2)
+    count = len(channel.sock.packets)
+    time.sleep(0.15)
+    assert len(channel.sock.packets) == count
+
+def test_on_transmit_sees_only_packets_on_the_wire(channel):
+    transmitted = []
+    channel.on_transmit = lambda command, speed: transmitted.append((command, speed))
+    channel.send("F", 40)
+    channel.send("F", 40)
+    channel.send("S")
+    assert transmitted == [("F", 40), ("S", None)]
+
+def test_full_socket_drops_and_retries():
+    channel = CommandChannel("127.0.0.1", 12345, sock=FullSocket())
+    try:
+        assert not channel.send("F", 40)
+        assert not channel.send("F", 40)
+        assert channel.dropped_count == 2
+        assert channel.coalesced_count == 0
+    finally:
+        channel.close()
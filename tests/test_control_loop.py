@@ -0,0 +1,68 @@
+import numpy as np
+
+from control_loop import MAX_SPEED, ProportionalController
+from marker_detector import MarkerDetections
+
+# Axis-aligned marker with the given center and diagonal (px)
+def marker(marker_id, cx, cy, diagonal):
+    half = diagonal / (2 * np.sqrt(2))
+    corners = np.array([[[cx - half, cy - half], [cx + half, cy - half],
+                         [cx + half, cy + half], [cx - half, cy + half]]], np.float32)
+    return MarkerDetections(np.array([marker_id], np.int32), corners)
+
+def make_controller(**kwargs):
+    sent = []
+    controller = ProportionalController(lambda command, speed=None: sent.append((command, speed)), **kwargs)
+    return controller, sent
+
+def test_stops_without_observation():
+    controller, _ = make_controller()
+    assert controller.compute_command(now=0.0) == ("S", None)
+
+def test_drives_towards_centered_marker():
+    controller, _ = make_controller()
+    controller.update(marker(72, 320, 240, 50), 640, timestamp=0.0)
+    command, speed = controller.compute_command(now=0.0)
+    assert command == "F"
+    assert controller.min_speed <= speed <= MAX_SPEED
+
+def test_turns_towards_marker_off_centre():
+    controller, _ = make_controller()
+    controller.update(marker(72, 40, 240, 50), 640, timestamp=0.0)
+    assert controller.compute_command(now=0.0)[0] == "L"
+    controller.update(marker(72, 600, 240, 50), 640, timestamp=0.1)
+    assert controller.compute_command(now=0.1)[0] == "R"
+
+def test_stops_when_close_or_lost():
+    controller, _ = make_controller(stop_size=200)
+    controller.update(marker(72, 320, 240, 250), 640, timestamp=0.0)
+    assert controller.compute_command(now=0.0) == ("S", None)
+
+    controller.update(marker(72, 320, 240, 50), 640, timestamp=1.0)
+    assert controller.compute_command(now=1.0 + controller.lost_timeout + 0.01) == ("S", None)
+
+def test_ignores_other_markers():
+    controller, _ = make_controller()
+    controller.update(marker(5, 320, 240, 50), 640, timestamp=0.0)
+    assert controller.compute_command(now=0.0) == ("S", None)
+
+def test_stop_fraction_scales_with_frame_width():
+    controller, _ = make_controller(stop_fraction=0.25)
+    # The same relative marker size stops at both resolutions
+    controller.update(marker(72, 640, 360, 330), 1280, timestamp=0.0)
+    assert controller.compute_command(now=0.0) == ("S", None)
+    controller.update(marker(72, 320, 240, 165), 640, timestamp=1.0)
+    assert controller.compute_command(now=1.0) == ("S", None)
+    controller.update(marker(72, 320, 240, 100), 640, timestamp=2.0)
+    assert controller.compute_command(now=2.0)[0] == "F"
+
+def test_advance_ticks_at_control_rate():
+    controller, sent = make_controller(rate=50.0)
+    controller.active = True
+    controller.advance(0.0)
+    controller.advance(1.0)
+    assert len(sent) == 50
+
+    controller.active = False
+    controller.advance(2.0)
+    assert len(sent) == 50
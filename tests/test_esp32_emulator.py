@@ -0,0 +1,58 @@
+import socket
+
+import pytest
+
+from command_channel import CommandChannel, encode_binary, encode_text
+from esp32_emulator import Esp32Emulator, decode_packet, parse_fields
+
+def test_parse_fields_skips_empty_fields():
+    assert parse_fields("F,,40,") == ["F", "40"]
+
+@pytest.mark.parametrize("payload, expected", [
+    (encode_text("F"), ("F", 0, None)),
+    (encode_text("L", 20), ("L", 20, None)),
+    (encode_text("R", 20, sequence=7), ("R", 20, 7)),
+    (encode_text("S", sequence=255), ("S", 0, 255)),
+    (encode_binary("B", 63, sequence=9), ("B", 63, 9)),
+    (b"F,fast", ("F", 0, None)),
+])
+def test_decode_packet(payload, expected):
+    assert decode_packet(payload) == expected
+
+# Acknowledgements echo the sequence number of the packet they answer, whatever order
+# the packets were sent in
+def test_acknowledgements_echo_sequence():
+    emulator = Esp32Emulator("127.0.0.1", 0).start()
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sender.settimeout(2.0)
+    try:
+        for sequence in (5, 3, 200):
+            sender.sendto(encode_text("F", 20, sequence=sequence), emulator.address)
+            reply, _ = sender.recvfrom(256)
+            fields = reply.decode().split(",")
+            assert fields[:2] == ["ACK", str(sequence)]
+
+        sender.sendto(encode_text("S"), emulator.address)
+        reply, _ = sender.recvfrom(256)
+        assert reply.decode().split(",")[1] == "-1"
+    finally:
+        sender.close()
+        emulator.stop()
+
+def test_sequenced_channel_numbers_text_packets():
+    sent = []
+
+    class Recorder:
+        def sendto(self, data, address):
+            sent.append(data)
+
+        def close(self):
+            pass
+
+    channel = CommandChannel("127.0.0.1", 12345, sock=Recorder(), sequenced=True)
+    try:
+        channel.send("F", 40)
+        channel.send("L", 40)
+    finally:
+        channel.close()
+    assert [decode_packet(packet)[2] for packet in sent] == [0, 1]
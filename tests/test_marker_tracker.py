@@ -0,0 +1,83 @@
+import cv2
+from cv2 import aruco
+import numpy as np
+
+from marker_detector import MarkerDetector
+from marker_tracker import FlowMarkerTracker, RoiMarkerTracker, is_marker_quad
+
+DICTIONARY = aruco.getPredefinedDictionary(aruco.DICT_4X4_250)
+
+# White 640x480 frame with markers at the given top-left positions
+def frame(markers, side=100):
+    image = np.full((480, 640), 255, np.uint8)
+    for marker_id, (x, y) in markers.items():
+        marker = cv2.copyMakeBorder(aruco.generateImageMarker(DICTIONARY, marker_id, side),
+                                    20, 20, 20, 20, cv2.BORDER_CONSTANT, value=255)
+        image[y:y + marker.shape[0], x:x + marker.shape[1]] = marker
+    return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+
+# MarkerDetector that counts its calls and the size of the image it ran on
+class CountingDetector(MarkerDetector):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def detect(self, image):
+        self.calls.append(image.shape[:2])
+        return super().detect(image)
+
+def ids_of(result):
+    _, ids = result
+    return [] if ids is None else ids.ravel().tolist()
+
+def test_roi_frames_report_only_tracked_markers():
+    detector = CountingDetector()
+    tracker = RoiMarkerTracker(detector, tracked_ids=[72])
+
+    assert sorted(ids_of(tracker.detect(frame({72: (50, 100), 5: (400, 300)})))) == [5, 72]
+    assert ids_of(tracker.detect(frame({72: (55, 100), 5: (400, 300)}))) == [72]
+    assert detector.calls[-1] != (480, 640)  # Searched a crop
+
+def test_first_miss_rescans_the_full_frame():
+    detector = CountingDetector()
+    tracker = RoiMarkerTracker(detector, tracked_ids=[72])
+    tracker.detect(frame({72: (50, 100)}))
+    tracker.detect(frame({72: (55, 100)}))
+
+    # The marker jumps out of its crop: found again on the same frame
+    assert ids_of(tracker.detect(frame({72: (400, 100)}))) == [72]
+    assert detector.calls[-1] == (480, 640)
+    assert ids_of(tracker.detect(frame({72: (405, 100)}))) == [72]
+
+def test_lost_marker_drops_the_track():
+    tracker = RoiMarkerTracker(MarkerDetector(), tracked_ids=[72])
+    tracker.detect(frame({72: (50, 100)}))
+    assert ids_of(tracker.detect(frame({}))) == []
+    assert not tracker.tracks
+
+def test_flow_tracks_between_detections():
+    detector = CountingDetector()
+    tracker = FlowMarkerTracker(detector, tracked_ids=[72], detect_interval=5)
+
+    for k in range(10):
+        x = 50 + 3 * k
+        corners, ids = tracker.detect(frame({72: (x, 100)}))
+        assert ids.ravel().tolist() == [72]
+        # Top-left corner of the marker, inside its 20 px quiet zone
+        assert np.allclose(corners[0][0][0], (x + 20 - 0.5, 120 - 0.5), atol=1.5)
+
+    assert tracker.detections == 2
+    assert tracker.tracked == 8
+
+def test_flow_detects_again_when_the_marker_vanishes():
+    detector = CountingDetector()
+    tracker = FlowMarkerTracker(detector, tracked_ids=[72], detect_interval=5)
+    tracker.detect(frame({72: (50, 100)}))
+    assert ids_of(tracker.detect(frame({}))) == []
+    assert tracker.detections == 2
+
+def test_is_marker_quad():
+    square = np.array([[0, 0], [10, 0], [10, 10], [0, 10]], np.float32)
+    assert is_marker_quad(square)
+    assert not is_marker_quad(square[[0, 2, 1, 3]])  # Self-intersecting
+    assert not is_marker_quad(np.array([[0, 0], [10, 0], [10, 2], [0, 2]], np.float32))
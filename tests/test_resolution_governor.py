@@ -0,0 +1,56 @@
+from resolution_governor import DEFAULT_LEVELS, ResolutionGovernor
+
+def make_governor(**kwargs):
+    options = dict(budget_ms=20.0, degrade_frames=3, upgrade_frames=5, cooldown_frames=4, smoothing=1.0)
+    options.update(kwargs)
+    return ResolutionGovernor(**options)
+
+# Feed the same frame time n times, returns the settings reported as changes
+def feed(governor, frame_ms, n, marker_fraction=None):
+    return [s for s in (governor.observe(frame_ms, marker_fraction) for _ in range(n)) if s is not None]
+
+def test_first_frame_applies_first_level_without_resolution():
+    governor = make_governor()
+    assert governor.observe(5.0) == DEFAULT_LEVELS[0]
+
+def test_starts_at_camera_resolution():
+    governor = make_governor(resolution=(640, 480))
+    assert governor.setting == (640, 480, 1)
+    assert governor.observe(5.0) is None
+
+def test_unknown_resolution_snaps_to_nearest_lower_level():
+    governor = make_governor(resolution=(800, 600))
+    assert governor.observe(5.0) == (640, 480, 1)
+
+def test_degrades_only_after_sustained_overrun():
+    governor = make_governor(resolution=(1280, 720))
+    assert feed(governor, 30.0, 2) == []
+    assert feed(governor, 30.0, 1) == [DEFAULT_LEVELS[1]]
+
+def test_single_spike_does_not_degrade():
+    governor = make_governor(resolution=(1280, 720))
+    assert feed(governor, 30.0, 2) == []
+    assert feed(governor, 10.0, 1) == []
+    assert feed(governor, 30.0, 2) == []
+
+def test_cooldown_after_change():
+    governor = make_governor(resolution=(1280, 720))
+    feed(governor, 30.0, 3)
+    # Cooldown frames are ignored, then degrade_frames more are needed
+    assert feed(governor, 30.0, 4 + 2) == []
+    assert feed(governor, 30.0, 1) == [DEFAULT_LEVELS[2]]
+
+def test_upgrades_only_with_predicted_headroom():
+    governor = make_governor(resolution=(960, 540))
+    # 15 ms at 960x540 predicts ~27 ms at 1280x720, over budget: no upgrade
+    assert feed(governor, 15.0, 20) == []
+    # 5 ms predicts ~9 ms, well within the budget
+    assert feed(governor, 5.0, 5) == [DEFAULT_LEVELS[0]]
+
+def test_close_marker_hysteresis():
+    governor = make_governor(resolution=(1280, 720))
+    close_level = DEFAULT_LEVELS[governor.large_marker_level]
+    assert feed(governor, 5.0, 1, marker_fraction=0.3) == [close_level]
+    # Between the exit and enter thresholds the close range is kept
+    assert feed(governor, 5.0, 10, marker_fraction=0.2) == []
+    assert feed(governor, 5.0, 1, marker_fraction=0.1) == [DEFAULT_LEVELS[0]]
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from marker_detector import MarkerDetections
+from session_recorder import LOG_HEADER, SessionLog, iter_log_records, load_session
+
+def make_detections(ids):
+    corners = np.arange(len(ids) * 8, dtype=np.float32).reshape(-1, 4, 2)
+    return MarkerDetections(np.array(ids, np.int32), corners)
+
+def write_session(path):
+    log = SessionLog(str(path), flush_interval=60.0)
+    log.log_command("S", timestamp_ns=1)
+    log.log_frame(1, timestamp_ns=10)
+    log.log_detections(1, make_detections([72, 5]), timestamp_ns=11)
+    log.log_command("F", 40, timestamp_ns=12)
+    log.log_video_frame(1, timestamp_ns=13)
+    log.log_frame(2, timestamp_ns=20)
+    log.log_command("L", 16, timestamp_ns=21)
+    log.close()
+    return log
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "run.agvlog"
+    log = write_session(path)
+    assert log.record_count == 7
+
+    frames, initial_commands = load_session(str(path))
+    assert initial_commands == [(1, "S", None)]
+    assert [frame.frame_index for frame in frames] == [1, 2]
+
+    first, second = frames
+    assert first.timestamp_ns == 10
+    assert first.detections.ids.tolist() == [72, 5]
+    np.testing.assert_array_equal(first.detections.corners, make_detections([72, 5]).corners)
+    assert first.commands == [(12, "F", 40)]
+    assert first.video_position == 0
+
+    assert second.detections is None
+    assert second.commands == [(21, "L", 16)]
+    assert second.video_position is None
+
+def test_truncated_record_ends_iteration(tmp_path):
+    path = tmp_path / "run.agvlog"
+    write_session(path)
+    data = path.read_bytes()
+    records = list(iter_log_records(str(path)))
+
+    # Cut the last record in half, as a crash while writing would
+    path.write_bytes(data[:-3])
+    assert list(iter_log_records(str(path))) == records[:-1]
+
+    frames, _ = load_session(str(path))
+    assert frames[-1].commands == []
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"not a log" + LOG_HEADER)
+    with pytest.raises(ValueError):
+        list(iter_log_records(str(path)))
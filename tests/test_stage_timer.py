@@ -0,0 +1,58 @@
+import threading
+
+import numpy as np
+
+from stage_timer import StageTimer
+
+def test_summary_percentiles():
+    timer = StageTimer(window=100)
+    for ms in range(1, 101):
+        timer.record("detect", ms / 1000.0)
+    stats = timer.summary()["detect"]
+    assert stats["count"] == 100
+    assert abs(stats["p50_ms"] - 50.5) < 1e-6
+    assert abs(stats["mean_ms"] - 50.5) < 1e-6
+
+def test_window_keeps_recent_samples():
+    timer = StageTimer(window=10)
+    for _ in range(10):
+        timer.record("detect", 1.0)
+    for _ in range(10):
+        timer.record("detect", 0.001)
+    stats = timer.summary()["detect"]
+    assert stats["count"] == 20
+    assert abs(stats["p99_ms"] - 1.0) < 1e-6
+
+def test_stages_from_several_threads():
+    timer = StageTimer(window=100000)
+
+    def work():
+        for _ in range(2000):
+            with timer.stage("send"):
+                pass
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert timer.summary()["send"]["count"] == 8000
+    assert len(timer.samples_ms("send")) == 8000
+
+def test_overlay_text_is_cached():
+    timer = StageTimer(overlay_interval=60.0)
+    image = np.zeros((100, 300, 3), np.uint8)
+    timer.record("detect", 0.005)
+    timer.draw_overlay(image)
+    lines = timer._overlay[1]
+
+    timer.record("control", 0.001)
+    timer.draw_overlay(image)
+    assert timer._overlay[1] is lines
+
+def test_disabled_timer_records_nothing():
+    timer = StageTimer(enabled=False)
+    with timer.stage("detect"):
+        pass
+    assert timer.summary() == {}
+    assert timer.fps() == 0.0
@@ -0,0 +1,160 @@
+"""
+Author: Yash Pathak [Github: vindicta07]
+Email: yashpradeeppathak@gmail.com
+Description: Multi-process vision pipeline (capture, detection/control, recorder, viewer) over a shared-memory frame bus
+"""
+
+import argparse
+import multiprocessing as mp
+import queue
+
+import cv2
+
+from frame_bus import FrameBus
+from replay import parse_source
+
+# Capture process: the only writer of the frame bus
+def capture_process(bus_name, source, stop_event):
+    bus = FrameBus.attach(bus_name)
+    cap = cv2.VideoCapture(parse_source(source))
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+    while not stop_event.is_set():
+        ret, frame = cap.read()
+        if not ret or frame.shape != bus.shape:
+            break
+        bus.publish(frame)
+
+    cap.release()
+    bus.close()
+    stop_event.set()
+
+# Detection/control process: runs the unchanged integrate_v2 detection and navigation on
+# the newest frame, straight from shared memory, and shares the results with the viewer.
+# With control_loop the commands come from integrate_v2's fixed-rate proportional
+# controller instead, fed the newest detections
+def detection_process(bus_name, detections_queue, stop_event, navigate, control_loop=False):
+    import integrate_v2
+
+    bus = FrameBus.attach(bus_name)
+    frame_height, frame_width = bus.shape[:2]
+    seq = -1
+
+    if navigate and control_loop:
+        integrate_v2.controller.active = True
+        integrate_v2.controller.start()
+
+    while not stop_event.is_set():
+        item = bus.wait_latest(seq, timeout=0.1)
+        if item is None:
+            continue
+        seq, _, frame = item
+
+        detections = integrate_v2.detect_ArUco_details(frame)
+        if not bus.is_current(seq):
+            continue  # The writer lapped us while detecting, the frame was torn
+
+        if navigate and control_loop:
+            integrate_v2.controller.update(detections, frame_width)
+        elif navigate:
+            integrate_v2.handle_robot_movement(detections, frame_width, frame_height)
+
+        # Small result, dropped rather than waited for when the viewer is slow
+        try:
+            detections_queue.put_nowait((seq, detections.ids, detections.corners))
+        except queue.Full:
+            pass
+
+    integrate_v2.controller.stop()
+    integrate_v2.channel.close()
+    bus.close()
+
+# Recorder process: writes every frame it manages to read to a video file
+def recorder_process(bus_name, path, fps, stop_event):
+    bus = FrameBus.attach(bus_name)
+    frame_height, frame_width = bus.shape[:2]
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (frame_width, frame_height))
+    seq = -1
+
+    while not stop_event.is_set():
+        item = bus.wait_latest(seq, copy=True, timeout=0.1)
+        if item is not None:
+            seq, _, frame = item
+            writer.write(frame)
+
+    writer.release()
+    bus.close()
+
+# Viewer process: shows the newest frame with the newest detections drawn on a copy
+def viewer_process(bus_name, detections_queue, stop_event):
+    from integrate_v2 import mark_ArUco_image
+    from marker_detector import MarkerDetections
+
+    bus = FrameBus.attach(bus_name)
+    detections = MarkerDetections.from_detection(None, None)
+    seq = -1
+
+    while not stop_event.is_set():
+        try:
+            while True:
+                _, ids, corners = detections_queue.get_nowait()
+                detections = MarkerDetections(ids, corners)
+        except queue.Empty:
+            pass
+
+        item = bus.wait_latest(seq, copy=True, timeout=0.1)
+        if item is not None:
+            seq, _, frame = item
+            cv2.imshow("AGV Vision Pipeline", mark_ArUco_image(frame, detections))
+
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            stop_event.set()
+
+    cv2.destroyAllWindows()
+    bus.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run capture, detection/control, recorder and viewer as separate processes")
+    parser.add_argument("--source", default="0", help="camera index or video file")
+    parser.add_argument("--slots", type=int, default=8, help="frame slots in the shared-memory ring")
+    parser.add_argument("--navigate", action="store_true", help="enable ArUco navigation (sends commands)")
+    parser.add_argument("--control-loop", action="store_true",
+                        help="navigate with the fixed-rate proportional controller instead of per-frame decisions")
+    parser.add_argument("--record", metavar="PATH", help="record the frames to a video file")
+    parser.add_argument("--record-fps", type=float, default=30.0)
+    parser.add_argument("--no-viewer", action="store_true", help="do not open a preview window")
+    args = parser.parse_args()
+
+    # Probe the frame shape once to size the ring buffer
+    cap = cv2.VideoCapture(parse_source(args.source))
+    ret, first_frame = cap.read()
+    cap.release()
+    if not ret:
+        print("Error: Could not read from video source.")
+        exit()
+
+    bus = FrameBus.create(first_frame.shape, slots=args.slots)
+    stop_event = mp.Event()
+    detections_queue = mp.Queue(maxsize=4)
+
+    processes = [
+        mp.Process(target=capture_process, args=(bus.name, args.source, stop_event)),
+        mp.Process(target=detection_process, args=(bus.name, detections_queue, stop_event, args.navigate, args.control_loop)),
+    ]
+    if args.record:
+        processes.append(mp.Process(target=recorder_process, args=(bus.name, args.record, args.record_fps, stop_event)))
+    if not args.no_viewer:
+        processes.append(mp.Process(target=viewer_process, args=(bus.name, detections_queue, stop_event)))
+
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        stop_event.set()
+        for process in processes:
+            process.join()
+    finally:
+        print(f"Published {bus.latest_seq() + 1} frames")
+        bus.close()